@@ -1,50 +1,243 @@
 from __future__ import annotations
 
 import argparse
+import heapq
 import json
 import os
 import time
-from collections import defaultdict
-from dataclasses import asdict
-from datetime import datetime, timezone
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import chain
+from operator import itemgetter
 from pathlib import Path
-from typing import Any
+from typing import Any, NamedTuple
 
+from polymarket_watch.alerts import market_to_dict, trade_to_dict, wallet_stats_to_dict
 from polymarket_watch.polymarket import Market, PolymarketClient, Trade
 from polymarket_watch.scoring import score_trade, trade_notional_usd
 from polymarket_watch.store import WalletStats
 
+try:
+    import orjson as _orjson
+except ImportError:  # pragma: no cover - optional speedup
+    _orjson = None
+
+
+# Shared encoders: `json.dumps(..., sort_keys=True)` constructs a fresh JSONEncoder on every
+# call, which adds up across per-alert JSONL lines.
+_JSON_PRETTY = json.JSONEncoder(indent=2, sort_keys=True)
+_JSON_SORTED = json.JSONEncoder(sort_keys=True)
+# Machine-read state (snapshot and change log) is written compact; only the public feed is indented.
+_JSON_COMPACT = json.JSONEncoder(separators=(",", ":"), sort_keys=True)
+
+
+def _json_loads(data: bytes) -> Any:
+    # orjson (when installed) only speeds up parsing; everything written still goes through the
+    # stdlib encoders above so committed files stay byte-stable either way.
+    if _orjson is not None:
+        try:
+            return _orjson.loads(data)
+        except ValueError:
+            pass  # e.g. NaN/Infinity or >64-bit ints, which the stdlib parser accepts
+    return json.loads(data)
+
 
 def _load_json(path: Path, default: Any) -> Any:
     if not path.exists():
         return default
     try:
-        return json.loads(path.read_text(encoding="utf-8"))
+        return _json_loads(path.read_bytes())
     except Exception:
         return default
 
 
-def _atomic_write(path: Path, content: str) -> None:
+def _atomic_write(path: Path, content: str, *, durable: bool = False) -> None:
+    # `durable` fsyncs before the rename; only the state snapshot needs it, since the public
+    # feeds are regenerated from state on every run.
     path.parent.mkdir(parents=True, exist_ok=True)
     tmp = path.with_suffix(path.suffix + ".tmp")
-    tmp.write_text(content, encoding="utf-8")
-    tmp.replace(path)
+    with tmp.open("wb") as f:
+        f.write(content.encode("utf-8"))
+        if durable:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _sync_text(path: Path, content: str) -> None:
+    # Leave the file alone when unchanged and append when the old content is a prefix (the
+    # usual JSONL feed update); anything else (evictions, reordering) is a full rewrite.
+    data = content.encode("utf-8")
+    try:
+        current = path.read_bytes()
+    except OSError:
+        current = b""
+    if current == data:
+        return
+    if current.endswith(b"\n") and data.startswith(current):
+        with path.open("ab") as f:
+            f.write(data[len(current) :])
+        return
+    _atomic_write(path, content)
 
 
 def _append_lines(path: Path, lines: list[str]) -> None:
     if not lines:
         return
+    # One buffered write per file rather than two small writes per line.
+    buf = "".join(line if line.endswith("\n") else line + "\n" for line in lines)
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("a", encoding="utf-8") as f:
-        for line in lines:
-            f.write(line)
-            if not line.endswith("\n"):
-                f.write("\n")
+    with path.open("ab") as f:
+        f.write(buf.encode("utf-8"))
+
+
+# Runs append a compact delta of what they changed to `state.log.jsonl` next to `state.json`
+# instead of re-serializing the whole state; the log is folded back into the snapshot once it
+# grows past `--state-log-max-bytes`.
+_STATE_SUBTREES = ("wallets", "markets", "alerts", "market_events")
+_STATE_SCALARS = ("last_fetched_trade_ts", "last_fetched_trade_ids", "updated_at")
+
+
+def _state_log_path(state_path: Path) -> Path:
+    return state_path.with_suffix(".log.jsonl")
+
+
+def _apply_state_delta(
+    state: dict[str, Any], delta: Any, *, seen: deque[str], seen_set: set[str]
+) -> None:
+    # `seen` / `seen_set` carry `seen_trade_ids` across a whole log replay, so each delta only
+    # pays for the IDs it adds or evicts.
+    if not isinstance(delta, dict):
+        return
+    sets = delta.get("set") if isinstance(delta.get("set"), dict) else {}
+    dels = delta.get("del") if isinstance(delta.get("del"), dict) else {}
+    for name in _STATE_SUBTREES:
+        entries = sets.get(name)
+        removed = dels.get(name)
+        if not isinstance(entries, dict) and not isinstance(removed, list):
+            continue
+        subtree = state.get(name)
+        if not isinstance(subtree, dict):
+            subtree = {}
+            state[name] = subtree
+        if isinstance(entries, dict):
+            subtree.update(entries)
+        if isinstance(removed, list):
+            for k in removed:
+                subtree.pop(k, None)
+
+    top = delta.get("top")
+    if isinstance(top, dict):
+        for name in _STATE_SCALARS:
+            if name in top:
+                state[name] = top[name]
+
+    seen_add = delta.get("seen_add")
+    if isinstance(seen_add, list) and seen_add:
+        # Replay must be idempotent: a crash between compaction and log removal replays
+        # deltas that the snapshot already contains.
+        for x in seen_add:
+            if x not in seen_set:
+                seen.append(x)
+                seen_set.add(x)
+        seen_max = delta.get("seen_max")
+        if isinstance(seen_max, int):
+            while len(seen) > max(0, seen_max):
+                seen_set.discard(seen.popleft())
+
+
+def _load_state(state_path: Path) -> dict[str, Any]:
+    state = _load_json(state_path, default={})
+    if not isinstance(state, dict):
+        state = {}
+    log_path = _state_log_path(state_path)
+    if log_path.exists():
+        seen_raw = state.get("seen_trade_ids")
+        seen: deque[str] = deque(seen_raw if isinstance(seen_raw, list) else [])
+        seen_set = set(seen)
+        for line in log_path.read_bytes().splitlines():
+            try:
+                delta = _json_loads(line)
+            except ValueError:
+                # A torn final line from an interrupted run only loses that run's delta.
+                continue
+            _apply_state_delta(state, delta, seen=seen, seen_set=seen_set)
+        state["seen_trade_ids"] = list(seen)
+    _materialize_market_events(state)
+    return state
+
+
+def _state_key_snapshot(state: dict[str, Any]) -> dict[str, set[str]]:
+    snapshot: dict[str, set[str]] = {}
+    for name in _STATE_SUBTREES:
+        subtree = state.get(name)
+        snapshot[name] = set(subtree.keys()) if isinstance(subtree, dict) else set()
+    return snapshot
+
+
+def _state_delta(
+    state: dict[str, Any],
+    *,
+    keys_before: dict[str, set[str]],
+    touched: dict[str, set[str]],
+    seen_added: list[str],
+    seen_max: int,
+) -> dict[str, Any]:
+    sets: dict[str, dict[str, Any]] = {}
+    dels: dict[str, list[str]] = {}
+    for name in _STATE_SUBTREES:
+        subtree = state.get(name)
+        current = subtree if isinstance(subtree, dict) else {}
+        before = keys_before.get(name, set())
+        changed = (touched.get(name, set()) | (current.keys() - before)) & current.keys()
+        if changed:
+            sets[name] = {k: current[k] for k in sorted(changed)}
+        removed = before - current.keys()
+        if removed:
+            dels[name] = sorted(removed)
+    return {
+        "set": sets,
+        "del": dels,
+        "top": {name: state[name] for name in _STATE_SCALARS if name in state},
+        "seen_add": seen_added,
+        "seen_max": seen_max,
+    }
+
+
+def _save_state(
+    state: dict[str, Any], state_path: Path, *, delta: dict[str, Any], max_log_bytes: int
+) -> None:
+    log_path = _state_log_path(state_path)
+    if state_path.exists() and max_log_bytes > 0:
+        _append_lines(log_path, [_JSON_COMPACT.encode(delta)])
+        if log_path.stat().st_size <= max_log_bytes:
+            return
+    # Compact: the snapshot already includes every logged delta, so write it before dropping
+    # the log (replay is idempotent if we're interrupted in between).
+    _atomic_write(state_path, _JSON_COMPACT.encode(state) + "\n", durable=True)
+    log_path.unlink(missing_ok=True)
+
+
+# Archive and day-cap keys only depend on the UTC day, so memoize per day number instead of
+# converting the timestamp for every alert.
+@lru_cache(maxsize=4096)
+def _utc_day_fields(day: int) -> tuple[int, int, int]:
+    tm = time.gmtime(day * 86_400)
+    return tm.tm_year, tm.tm_mon, tm.tm_mday
+
+
+def _render_feed(meta: dict[str, Any], alert_lines: list[str]) -> str:
+    # The pretty-printed `{"alerts": [...], **meta}` document, with each alert on a single line
+    # as its already-encoded compact JSON ("alerts" sorts before every meta key).
+    alerts = "[\n    " + ",\n    ".join(alert_lines) + "\n  ]" if alert_lines else "[]"
+    return '{\n  "alerts": ' + alerts + ",\n" + _JSON_PRETTY.encode(meta)[2:] + "\n"
 
 
 def _archive_path(archive_dir: Path, ts: int) -> Path:
-    dt = datetime.fromtimestamp(int(ts), tz=timezone.utc)
-    return archive_dir / f"alerts-{dt:%Y-%m}.jsonl"
+    year, month, _ = _utc_day_fields(int(ts) // 86_400)
+    return archive_dir / f"alerts-{year:04d}-{month:02d}.jsonl"
 
 
 def _now_ts() -> int:
@@ -79,48 +272,82 @@ def _as_market(obj: dict[str, Any]) -> Market:
     )
 
 
+def _new_wallet() -> dict[str, Any]:
+    return {
+        "first_seen_ts": None,
+        "ev_ts": [],
+        "ev_cond": [],
+        "ev_not": [],
+        "markets": [],
+        "trades_total": 0,
+    }
+
+
+def _wallet_columns(w: dict[str, Any]) -> tuple[list[int], list[str], list[float]]:
+    # Wallet events are stored column-wise (`ev_ts` / `ev_cond` / `ev_not`, kept ts-sorted) so
+    # stats can bisect and reduce typed lists directly; legacy
+    # `events: [[ts, condition_id, notional], ...]` rows are migrated on first touch.
+    legacy = w.pop("events", None)
+    ev_ts, ev_cond, ev_not = w.get("ev_ts"), w.get("ev_cond"), w.get("ev_not")
+    if (
+        isinstance(ev_ts, list)
+        and isinstance(ev_cond, list)
+        and isinstance(ev_not, list)
+        and len(ev_ts) == len(ev_cond) == len(ev_not)
+    ):
+        return ev_ts, ev_cond, ev_not
+
+    rows: list[tuple[int, str, float]] = []
+    for e in legacy if isinstance(legacy, list) else []:
+        if not isinstance(e, list) or len(e) < 3:
+            continue
+        try:
+            rows.append((int(e[0]), str(e[1]), float(e[2])))
+        except Exception:
+            continue
+    rows.sort(key=itemgetter(0))
+    ev_ts = [r[0] for r in rows]
+    ev_cond = [r[1] for r in rows]
+    ev_not = [r[2] for r in rows]
+    w["ev_ts"], w["ev_cond"], w["ev_not"] = ev_ts, ev_cond, ev_not
+    return ev_ts, ev_cond, ev_not
+
+
 def _wallet_stats_from_state(
-    state: dict[str, Any], wallet: str, *, min_notional: float
+    state: dict[str, Any], wallet: str, *, min_notional: float, now_ts: int | None = None
 ) -> WalletStats:
     wallets = state.setdefault("wallets", {})
     w = wallets.get(wallet)
     if not isinstance(w, dict):
-        w = {"first_seen_ts": None, "events": [], "markets": [], "trades_total": 0}
+        w = _new_wallet()
         wallets[wallet] = w
 
-    events: list[list[Any]] = w.get("events") or []
-    filtered: list[list[Any]] = []
-    for e in events:
-        if not isinstance(e, list) or len(e) < 3:
-            continue
-        try:
-            if float(e[2]) >= min_notional:
-                filtered.append(e)
-        except Exception:
-            continue
-    events = filtered
+    ev_ts, ev_cond, ev_not = _wallet_columns(w)
+    if ev_not and min(ev_not) < min_notional:
+        kept = [i for i, n in enumerate(ev_not) if n >= min_notional]
+        ev_ts = [ev_ts[i] for i in kept]
+        ev_cond = [ev_cond[i] for i in kept]
+        ev_not = [ev_not[i] for i in kept]
 
-    cutoff = _now_ts() - 7 * 24 * 60 * 60
-    events_7d = [e for e in events if int(e[0]) >= cutoff]
-    notional_sum = sum(float(e[2]) for e in events_7d) if events_7d else 0.0
-    avg_notional_7d = notional_sum / len(events_7d) if events_7d else 0.0
+    cutoff = (_now_ts() if now_ts is None else now_ts) - 7 * 24 * 60 * 60
+    start = bisect_left(ev_ts, cutoff)
+    trades_7d = len(ev_ts) - start
+    notional_sum = sum(ev_not[start:])
+    avg_notional_7d = notional_sum / trades_7d if trades_7d else 0.0
 
     markets: list[str] = w.get("markets") or []
     markets_total = set(markets)
-    markets_7d = {str(e[1]) for e in events_7d}
+    markets_7d = set(ev_cond[start:])
 
     first_seen_ts_raw = w.get("first_seen_ts")
     try:
         first_seen_ts = int(first_seen_ts_raw) if first_seen_ts_raw is not None else None
     except Exception:
         first_seen_ts = None
-    if first_seen_ts is None and events:
-        try:
-            first_seen_ts = int(min(int(e[0]) for e in events))
-        except Exception:
-            first_seen_ts = None
+    if first_seen_ts is None and ev_ts:
+        first_seen_ts = ev_ts[0]
 
-    trades_total = len(events)
+    trades_total = len(ev_ts)
     try:
         trades_total = max(trades_total, int(w.get("trades_total", trades_total) or 0))
     except Exception:
@@ -131,17 +358,24 @@ def _wallet_stats_from_state(
         first_seen_ts=first_seen_ts,
         trades_total=trades_total,
         unique_markets_total=len(markets_total),
-        trades_7d=len(events_7d),
+        trades_7d=trades_7d,
         unique_markets_7d=len(markets_7d),
         avg_notional_7d=avg_notional_7d,
     )
 
 
-def _record_wallet_event(state: dict[str, Any], trade: Trade, notional: float) -> None:
+def _record_wallet_event(
+    state: dict[str, Any],
+    trade: Trade,
+    notional: float,
+    *,
+    market_sets: dict[str, set[str]] | None = None,
+    now_ts: int | None = None,
+) -> None:
     wallets = state.setdefault("wallets", {})
     w = wallets.get(trade.proxy_wallet)
     if not isinstance(w, dict):
-        w = {"first_seen_ts": None, "events": [], "markets": [], "trades_total": 0}
+        w = _new_wallet()
         wallets[trade.proxy_wallet] = w
 
     if w.get("first_seen_ts") is None:
@@ -152,20 +386,43 @@ def _record_wallet_event(state: dict[str, Any], trade: Trade, notional: float) -
     except Exception:
         w["trades_total"] = 1
 
-    events: list[list[Any]] = w.get("events") or []
-    events.append([int(trade.timestamp), trade.condition_id, float(notional)])
+    ev_ts, ev_cond, ev_not = _wallet_columns(w)
+    ts = int(trade.timestamp)
+    if not ev_ts or ev_ts[-1] <= ts:
+        ev_ts.append(ts)
+        ev_cond.append(trade.condition_id)
+        ev_not.append(float(notional))
+    else:
+        i = bisect_right(ev_ts, ts)
+        ev_ts.insert(i, ts)
+        ev_cond.insert(i, trade.condition_id)
+        ev_not.insert(i, float(notional))
 
+    # `market_sets` is a per-run wallet -> set mirror of the persisted `markets` list, so active
+    # wallets don't rescan up to 500 entries per trade.
     markets: list[str] = w.get("markets") or []
-    if trade.condition_id and trade.condition_id not in markets:
-        markets.append(trade.condition_id)
+    known: set[str] | None = None
+    if trade.condition_id:
+        known = market_sets.get(trade.proxy_wallet) if market_sets is not None else None
+        if known is None:
+            known = set(markets)
+            if market_sets is not None:
+                market_sets[trade.proxy_wallet] = known
+        if trade.condition_id not in known:
+            markets.append(trade.condition_id)
+            known.add(trade.condition_id)
 
     # Prune to rolling 7d and cap size for repo-friendly state.
-    cutoff = _now_ts() - 7 * 24 * 60 * 60
-    events = [e for e in events if int(e[0]) >= cutoff]
-    if len(events) > 400:
-        events = events[-400:]
-    w["events"] = events
-    w["markets"] = markets[-500:]
+    cutoff = (_now_ts() if now_ts is None else now_ts) - 7 * 24 * 60 * 60
+    drop = max(bisect_left(ev_ts, cutoff), len(ev_ts) - 400)
+    if drop > 0:
+        del ev_ts[:drop], ev_cond[:drop], ev_not[:drop]
+    if len(markets) > 500:
+        markets = markets[-500:]
+        if known is not None:
+            known.clear()
+            known.update(markets)
+    w["markets"] = markets
 
 
 def _alert_dedupe_key(alert: dict[str, Any]) -> tuple[str, str, str]:
@@ -180,6 +437,19 @@ def _alert_dedupe_key(alert: dict[str, Any]) -> tuple[str, str, str]:
     )
 
 
+class MarketEvent(NamedTuple):
+    ts: int
+    wallet: str
+    price: float
+    notional: float
+    outcome_index: int | None = None
+    side: str | None = None
+
+
+def _event_ts(e: MarketEvent) -> int:
+    return e.ts
+
+
 def _record_market_event(
     state: dict[str, Any],
     trade: Trade,
@@ -197,115 +467,168 @@ def _record_market_event(
     if not isinstance(events, list):
         events = []
         market_events[trade.condition_id] = events
-    events.append(
-        [
-            int(trade.timestamp),
-            trade.proxy_wallet,
-            float(trade.price),
-            float(notional),
-            int(trade.outcome_index),
-            str(trade.side),
-        ]
+    ev = MarketEvent(
+        int(trade.timestamp),
+        trade.proxy_wallet,
+        float(trade.price),
+        float(notional),
+        int(trade.outcome_index),
+        str(trade.side),
     )
+    # Keep events ordered by ts so window cutoffs can be bisected; trades arrive sorted, so
+    # this is almost always a plain append.
+    if not events or events[-1].ts <= ev.ts:
+        events.append(ev)
+    else:
+        insort(events, ev, key=_event_ts)
 
     cutoff = int(now_ts) - int(keep_seconds)
-    pruned: list[list[Any]] = []
-    for e in events:
-        if not isinstance(e, list) or len(e) < 4:
-            continue
-        try:
-            if int(e[0]) >= cutoff:
-                pruned.append(e)
-        except Exception:
-            continue
+    pruned = [e for e in events if isinstance(e, MarketEvent) and e.ts >= cutoff]
     if len(pruned) > int(max_events_per_market):
         pruned = pruned[-int(max_events_per_market) :]
     market_events[trade.condition_id] = pruned
 
 
-def _window_stats(events: list[Any], *, since_ts: int) -> dict[str, Any]:
-    notional_sum = 0.0
-    wallets: set[str] = set()
-    raw_prices: list[float] = []
-    p0_prices: list[float] = []
-    notional_by_wallet: dict[str, float] = defaultdict(float)
-    trades_by_wallet: dict[str, int] = defaultdict(int)
+def _as_market_event(e: Any) -> MarketEvent | None:
+    if not isinstance(e, list) or len(e) < 4:
+        return None
+    try:
+        ts = int(e[0])
+        wallet = str(e[1] or "")
+        price = float(e[2])
+        notional = float(e[3])
+    except Exception:
+        return None
+
+    outcome_index = None
+    side = None
+    if len(e) >= 6:
+        try:
+            outcome_index = int(e[4])
+        except Exception:
+            outcome_index = None
+        side_raw = str(e[5] or "").upper()
+        if side_raw in {"BUY", "SELL"}:
+            side = side_raw
+    return MarketEvent(ts, wallet, price, notional, outcome_index, side)
+
+
+def _materialize_market_events(state: dict[str, Any]) -> None:
+    # Validate and type persisted `[ts, wallet, price, notional, outcome_index, side]` lists
+    # once at load; MarketEvent is a tuple, so it serializes back to the same JSON list.
+    market_events = state.get("market_events")
+    if not isinstance(market_events, dict):
+        return
+    for k, v in market_events.items():
+        if isinstance(v, list):
+            rows = [ev for ev in map(_as_market_event, v) if ev is not None]
+            rows.sort(key=_event_ts)
+            market_events[k] = rows
 
-    pro_notional_by_wallet: dict[str, float] = defaultdict(float)
-    anti_notional_by_wallet: dict[str, float] = defaultdict(float)
-    pro_trades_by_wallet: dict[str, int] = defaultdict(int)
-    anti_trades_by_wallet: dict[str, int] = defaultdict(int)
-    multi_outcome_seen = False
 
+def _parse_market_events(events: list[Any]) -> list[MarketEvent]:
+    rows: list[MarketEvent] = []
     for e in events:
-        if not isinstance(e, list) or len(e) < 4:
+        if type(e) is MarketEvent:
+            rows.append(e)
             continue
+        ev = _as_market_event(e)
+        if ev is not None:
+            rows.append(ev)
+    rows.sort(key=_event_ts)
+    return rows
+
+
+def _score_ceiling(events: list[Any]) -> tuple[int, bool]:
+    # Upper bound on fast + accum score (and whether a primary signal is reachable) from all
+    # retained events, which cover both windows. Mirrors the scoring thresholds in `main`;
+    # cold markets below `--min-score` skip the full window-stats pass.
+    notional = 0.0
+    for e in events:
         try:
-            ts = int(e[0])
-            if ts < int(since_ts):
-                continue
-            wallet = str(e[1] or "")
-            price = float(e[2])
-            notional = float(e[3])
+            notional += float(e[3])
         except Exception:
             continue
-        notional_sum += notional
-        wallets.add(wallet)
-        raw_prices.append(price)
-        notional_by_wallet[wallet] += notional
-        trades_by_wallet[wallet] += 1
-
-        outcome_index = None
-        side = None
-        if len(e) >= 6:
-            try:
-                outcome_index = int(e[4])
-            except Exception:
-                outcome_index = None
-            side_raw = str(e[5] or "").upper()
-            if side_raw in {"BUY", "SELL"}:
-                side = side_raw
-
-        # If we see trades on outcomes beyond {0,1}, treat the market as non-binary for
-        # canonical price/direction calculations.
-        if outcome_index is not None and outcome_index not in {0, 1}:
-            multi_outcome_seen = True
+    heat = 4 if notional >= 50_000 else 2 if notional >= 20_000 else 0
+    n = len(events)
+    if n < 2:
+        # A price range, participation, or a 2-trade whale needs at least two events.
+        return heat, False
+    participation = 2 if n >= 20 else 1 if n >= 5 else 0
+    whale = 9 if notional >= 50_000 else 7 if notional >= 25_000 else 0
+    return 6 + heat + participation + whale, True
+
+
+def _window_stats_multi(events: list[Any], *, since_ts_list: list[int]) -> list[dict[str, Any]]:
+    return _window_stats_sorted(_parse_market_events(events), since_ts_list=since_ts_list)
+
+
+def _window_stats_sorted(
+    events: list[MarketEvent], *, since_ts_list: list[int]
+) -> list[dict[str, Any]]:
+    # `events` must be ts-ordered (as kept in loaded state); each window is then just the tail
+    # slice from its bisected cutoff. Results follow the order of `since_ts_list`.
+    return [
+        _window_stats_rows(events[bisect_left(events, int(since_ts), key=_event_ts) :])
+        for since_ts in since_ts_list
+    ]
+
+
+def _window_stats_rows(rows: list[MarketEvent]) -> dict[str, Any]:
+    # Column-wise reductions (sum/min/max/set) run in C; only the per-wallet group-bys below
+    # still need a Python-level loop.
+    if rows:
+        _, wallets_col, prices_col, notionals_col, outcomes_col, _ = zip(*rows)
+    else:
+        wallets_col, prices_col, notionals_col, outcomes_col = (), (), (), ()
+    notional_sum = float(sum(notionals_col))
+    unique_wallets = len(set(wallets_col))
+    price_range_raw = (max(prices_col) - min(prices_col)) if len(prices_col) >= 2 else None
+
+    # If we see trades on outcomes beyond {0,1}, treat the market as non-binary for
+    # canonical price/direction calculations.
+    multi_outcome_seen = bool(set(outcomes_col) - {0, 1, None})
+
+    # One record per wallet: [notional, trades, pro0 notional, anti0 notional, pro0 trades,
+    # anti0 trades], so each event costs a single dict lookup.
+    by_wallet: dict[str, list[Any]] = {}
+    p0_prices: list[float] = []
+    binary = not multi_outcome_seen
+    for _ts, wallet, price, notional, outcome_index, side in rows:
+        rec = by_wallet.get(wallet)
+        if rec is None:
+            rec = [0.0, 0, 0.0, 0.0, 0, 0]
+            by_wallet[wallet] = rec
+        rec[0] += notional
+        rec[1] += 1
+        if not binary or outcome_index not in {0, 1}:
             continue
-
         # Canonicalize to "outcome 0" implied probability so we can compare apples-to-apples
         # even when trades are on different outcome tokens (e.g., "Yes" vs "No").
-        if outcome_index in {0, 1}:
-            p0 = price if outcome_index == 0 else (1.0 - price)
-            p0 = max(0.0, min(1.0, p0))
-            p0_prices.append(p0)
-
-            if side is not None:
-                pro0 = (outcome_index == 0 and side == "BUY") or (
-                    outcome_index == 1 and side == "SELL"
-                )
-                if pro0:
-                    pro_notional_by_wallet[wallet] += notional
-                    pro_trades_by_wallet[wallet] += 1
-                else:
-                    anti_notional_by_wallet[wallet] += notional
-                    anti_trades_by_wallet[wallet] += 1
-
-    price_range_raw = (max(raw_prices) - min(raw_prices)) if len(raw_prices) >= 2 else None
-    price_range = (
-        (max(p0_prices) - min(p0_prices))
-        if not multi_outcome_seen and len(p0_prices) >= 2
-        else None
-    )
+        p0 = price if outcome_index == 0 else (1.0 - price)
+        p0_prices.append(max(0.0, min(1.0, p0)))
+
+        if side is not None:
+            pro0 = (outcome_index == 0 and side == "BUY") or (outcome_index == 1 and side == "SELL")
+            if pro0:
+                rec[2] += notional
+                rec[4] += 1
+            else:
+                rec[3] += notional
+                rec[5] += 1
+
+    price_range = (max(p0_prices) - min(p0_prices)) if len(p0_prices) >= 2 else None
 
     top_wallet = None
     top_wallet_notional = 0.0
-    for w, v in notional_by_wallet.items():
-        if v > top_wallet_notional:
+    top_wallet_trades = 0
+    for w, rec in by_wallet.items():
+        if rec[0] > top_wallet_notional:
             top_wallet = w
-            top_wallet_notional = v
+            top_wallet_notional = rec[0]
+            top_wallet_trades = rec[1]
 
     top_wallet_share = (top_wallet_notional / notional_sum) if notional_sum > 0 else None
-    top_wallet_trades = trades_by_wallet.get(top_wallet or "", 0)
 
     top_net_wallet = None
     top_net_wallet_notional = 0.0
@@ -313,10 +636,8 @@ def _window_stats(events: list[Any], *, since_ts: int) -> dict[str, Any]:
     top_net_wallet_share_of_wallet = None
     top_net_wallet_share_of_market = None
     top_net_wallet_trades = 0
-    if not multi_outcome_seen:
-        for w in set(pro_notional_by_wallet.keys()) | set(anti_notional_by_wallet.keys()):
-            pro = float(pro_notional_by_wallet.get(w, 0.0) or 0.0)
-            anti = float(anti_notional_by_wallet.get(w, 0.0) or 0.0)
+    if binary:
+        for w, (_, _, pro, anti, pro_trades, anti_trades) in by_wallet.items():
             total = pro + anti
             if total <= 0:
                 continue
@@ -324,23 +645,18 @@ def _window_stats(events: list[Any], *, since_ts: int) -> dict[str, Any]:
             if net <= top_net_wallet_notional:
                 continue
             direction = "pro0" if pro >= anti else "anti0"
-            trades = (
-                int(pro_trades_by_wallet.get(w, 0) or 0)
-                if direction == "pro0"
-                else int(anti_trades_by_wallet.get(w, 0) or 0)
-            )
             top_net_wallet = w
             top_net_wallet_notional = net
             top_net_wallet_direction = direction
             top_net_wallet_share_of_wallet = net / total
-            top_net_wallet_trades = trades
+            top_net_wallet_trades = pro_trades if direction == "pro0" else anti_trades
 
         if top_net_wallet is not None and notional_sum > 0:
             top_net_wallet_share_of_market = top_net_wallet_notional / notional_sum
 
     return {
         "notional_sum": notional_sum,
-        "unique_wallets": len(wallets),
+        "unique_wallets": unique_wallets,
         "price_range": price_range,
         "price_range_raw": price_range_raw,
         "top_wallet": top_wallet,
@@ -357,80 +673,185 @@ def _window_stats(events: list[Any], *, since_ts: int) -> dict[str, Any]:
 
 
 def _day_key_utc(ts: int) -> str:
-    dt = datetime.fromtimestamp(int(ts), tz=timezone.utc)
-    return f"{dt:%Y-%m-%d}"
+    year, month, day = _utc_day_fields(int(ts) // 86_400)
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+
+def _alert_ts(alert: dict[str, Any]) -> int:
+    trade = alert.get("trade")
+    if not isinstance(trade, dict):
+        return 0
+    try:
+        return int(trade.get("timestamp", 0) or 0)
+    except Exception:
+        return 0
+
+
+def _alert_rank_key(alert: dict[str, Any]) -> tuple[float, float, int]:
+    try:
+        score = float(alert.get("score", 0) or 0)
+    except Exception:
+        score = 0.0
+    try:
+        notional = float(alert.get("notional", 0) or 0)
+    except Exception:
+        notional = 0.0
+    return (score, notional, _alert_ts(alert))
 
 
 def _cap_alerts_per_day(alerts: list[dict[str, Any]], *, max_per_day: int) -> list[dict[str, Any]]:
     if max_per_day <= 0:
         return []
 
-    by_day: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    # Rank keys are computed once per alert; the ts they carry also picks the UTC day.
+    by_day: dict[str, list[tuple[tuple[float, float, int], dict[str, Any]]]] = defaultdict(list)
     for a in alerts:
-        try:
-            ts = int(a.get("trade", {}).get("timestamp", 0))
-        except Exception:
-            ts = 0
-        by_day[_day_key_utc(ts)].append(a)
+        rank = _alert_rank_key(a)
+        by_day[_day_key_utc(rank[2])].append((rank, a))
 
-    kept: list[dict[str, Any]] = []
+    kept: list[tuple[tuple[float, float, int], dict[str, Any]]] = []
     for day in sorted(by_day.keys(), reverse=True):
-        day_alerts = by_day[day]
+        # Only the top few per day survive, so a bounded heap beats a full sort.
+        kept.extend(heapq.nlargest(max_per_day, by_day[day], key=itemgetter(0)))
 
-        def _sort_key(x: dict[str, Any]) -> tuple[float, float, int]:
-            try:
-                score = float(x.get("score", 0) or 0)
-            except Exception:
-                score = 0.0
-            try:
-                notional = float(x.get("notional", 0) or 0)
-            except Exception:
-                notional = 0.0
-            try:
-                ts = int(x.get("trade", {}).get("timestamp", 0) or 0)
-            except Exception:
-                ts = 0
-            return (score, notional, ts)
+    kept.sort(key=lambda ra: ra[0][2], reverse=True)
+    return [a for _, a in kept]
 
-        day_alerts_sorted = sorted(day_alerts, key=_sort_key, reverse=True)
-        kept.extend(day_alerts_sorted[:max_per_day])
 
-    return sorted(
-        kept,
-        key=lambda a: int(a.get("trade", {}).get("timestamp", 0) or 0),
-        reverse=True,
-    )
+def _cooldown_ts(v: Any) -> int:
+    try:
+        return int(v or 0)
+    except Exception:
+        return -1
 
 
-def _get_market(
-    state: dict[str, Any], client: PolymarketClient, condition_id: str
-) -> Market | None:
-    markets = state.setdefault("markets", {})
-    cached = markets.get(condition_id)
-    if isinstance(cached, dict):
-        try:
-            return _as_market(cached)
-        except Exception:
-            pass
+def _alert_notional(v: Any) -> float:
+    # Parsed feeds carry plain numbers; anything else takes the tolerant path, and unparseable
+    # values become NaN so they never clear the notional gate.
+    if isinstance(v, (int, float)):
+        return v
+    try:
+        return float(v or 0.0)
+    except Exception:
+        return float("nan")
 
-    market = client.get_market_by_condition_id(condition_id)
-    if market is None:
-        return None
-    markets[condition_id] = asdict(market)
-    return market
 
+def _prune_state(
+    state: dict[str, Any],
+    *,
+    now_ts: int,
+    keep_seconds: int,
+    market_events_keep_seconds: int,
+    max_events_per_market: int,
+    keep_wallets: set[str],
+    keep_markets: set[str],
+    touched_events: set[str],
+) -> None:
+    # One pass per subtree with deferred deletes; market events are ts-sorted, so their cutoff
+    # is a bisect and the trim happens in place.
+    cutoff = now_ts - keep_seconds
+
+    wallets = state.get("wallets")
+    if isinstance(wallets, dict):
+        drop: list[str] = []
+        for k, w in wallets.items():
+            if k in keep_wallets:
+                continue
+            if not isinstance(w, dict):
+                drop.append(k)
+                continue
+            last_seen = w.get("last_seen_ts")
+            if last_seen is None:
+                ev_ts = _wallet_columns(w)[0]
+                last_seen = ev_ts[-1] if ev_ts else None
+            if last_seen is None or int(last_seen) < cutoff:
+                drop.append(k)
+        for k in drop:
+            del wallets[k]
+
+    markets = state.get("markets")
+    if isinstance(markets, dict):
+        for k in markets.keys() - keep_markets:
+            del markets[k]
+
+    alerts = state.get("alerts")
+    if isinstance(alerts, dict):
+        # Cooldown stamps are ints written by `_mark_alerted`; anything else goes through the
+        # tolerant parse.
+        state["alerts"] = {
+            k: v
+            for k, v in alerts.items()
+            if (v >= cutoff if type(v) is int else _cooldown_ts(v) >= cutoff)
+        }
+
+    market_events = state.get("market_events")
+    if isinstance(market_events, dict):
+        event_cutoff = now_ts - market_events_keep_seconds
+        drop = []
+        for k, v in market_events.items():
+            if not isinstance(v, list):
+                drop.append(k)
+                continue
+            start = bisect_left(v, event_cutoff, key=_event_ts)
+            if start == len(v) and k not in keep_markets:
+                drop.append(k)
+                continue
+            if max_events_per_market > 0:
+                start = max(start, len(v) - max_events_per_market)
+            if start > 0:
+                del v[:start]
+                touched_events.add(k)
+        for k in drop:
+            del market_events[k]
 
-def _cooldown_ok(state: dict[str, Any], key: str, cooldown_s: int) -> bool:
+
+def _get_markets(
+    state: dict[str, Any],
+    client: PolymarketClient,
+    condition_ids: list[str],
+    *,
+    max_workers: int,
+) -> dict[str, Market | None]:
+    markets = state.setdefault("markets", {})
+    out: dict[str, Market | None] = {}
+    missing: list[str] = []
+    for condition_id in dict.fromkeys(condition_ids):
+        cached = markets.get(condition_id)
+        if isinstance(cached, dict):
+            try:
+                out[condition_id] = _as_market(cached)
+                continue
+            except Exception:
+                pass
+        missing.append(condition_id)
+
+    # Metadata lookups are independent HTTP calls, so overlap their latency; state is only
+    # updated back on this thread.
+    if max_workers > 1 and len(missing) > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(missing))) as ex:
+            fetched = list(ex.map(client.get_market_by_condition_id, missing))
+    else:
+        fetched = [client.get_market_by_condition_id(c) for c in missing]
+    for condition_id, market in zip(missing, fetched):
+        if market is not None:
+            markets[condition_id] = market_to_dict(market)
+        out[condition_id] = market
+    return out
+
+
+def _cooldown_ok(
+    state: dict[str, Any], key: str, cooldown_s: int, *, now_ts: int | None = None
+) -> bool:
     alerts = state.setdefault("alerts", {})
     last = alerts.get(key)
     if last is None:
         return True
-    return (_now_ts() - int(last)) >= cooldown_s
+    return ((_now_ts() if now_ts is None else now_ts) - int(last)) >= cooldown_s
 
 
-def _mark_alerted(state: dict[str, Any], key: str) -> None:
+def _mark_alerted(state: dict[str, Any], key: str, *, now_ts: int | None = None) -> None:
     alerts = state.setdefault("alerts", {})
-    alerts[key] = _now_ts()
+    alerts[key] = _now_ts() if now_ts is None else now_ts
 
 
 def _alert_to_public_dict(alert) -> dict[str, Any]:  # noqa: ANN001
@@ -440,9 +861,9 @@ def _alert_to_public_dict(alert) -> dict[str, Any]:  # noqa: ANN001
         "reasons": alert.reasons,
         "notional": alert.notional,
         "url": alert.url,
-        "trade": asdict(alert.trade),
-        "wallet_stats": asdict(alert.wallet_stats),
-        "market": (asdict(alert.market) if alert.market else None),
+        "trade": trade_to_dict(alert.trade),
+        "wallet_stats": wallet_stats_to_dict(alert.wallet_stats),
+        "market": (market_to_dict(alert.market) if alert.market else None),
     }
 
 
@@ -496,7 +917,7 @@ def main(argv: list[str] | None = None) -> int:
     p.add_argument(
         "--archive-dir",
         default="archive",
-        help="Directory for append-only JSONL archives (partitioned monthly).",
+        help="Directory for append-only JSONL archives (partitioned monthly); empty to skip.",
     )
     p.add_argument("--limit", type=int, default=500, help="Trades fetch page size (max 500).")
     p.add_argument(
@@ -555,14 +976,28 @@ def main(argv: list[str] | None = None) -> int:
         default=14 * 24 * 60 * 60,
         help="How long to keep wallet/market/cooldown state (seconds).",
     )
+    p.add_argument(
+        "--state-log-max-bytes",
+        type=int,
+        default=2_000_000,
+        help="Compact the state change log into the state JSON past this size (0 = every run).",
+    )
+    p.add_argument(
+        "--market-fetch-workers",
+        type=int,
+        default=8,
+        help="Concurrent market metadata lookups for alerting markets.",
+    )
     args = p.parse_args(argv)
 
     state_path = Path(args.state)
     out_path = Path(args.out)
     out_jsonl_path = Path(args.out_jsonl)
-    archive_dir = Path(args.archive_dir)
+    archive_dir = Path(args.archive_dir) if args.archive_dir else None
 
-    state: dict[str, Any] = _load_json(state_path, default={})
+    state = _load_state(state_path)
+    state_keys_before = _state_key_snapshot(state)
+    touched: dict[str, set[str]] = {name: set() for name in _STATE_SUBTREES}
     client = PolymarketClient()
 
     since_ts_raw = state.get("last_fetched_trade_ts")
@@ -586,15 +1021,36 @@ def main(argv: list[str] | None = None) -> int:
 
     now_ts = _now_ts()
 
-    seen_list = state.setdefault("seen_trade_ids", [])
-    if not isinstance(seen_list, list):
-        seen_list = []
-        state["seen_trade_ids"] = seen_list
-    seen_set = set(seen_list)
+    # Loop invariants: convert CLI values once rather than on every trade / market.
+    min_notional = float(args.min_notional)
+    min_score = int(args.min_score)
+    cooldown_s = int(args.cooldown_seconds)
+    require_primary = bool(args.require_primary_signal)
+    fast_window_s = int(args.fast_window_seconds)
+    accum_window_s = int(args.accum_window_seconds)
+    market_events_keep_s = int(args.market_events_keep_seconds)
+    max_events_per_market = int(args.market_events_max_per_market)
+
+    # Bounded FIFO of seen IDs: the deque keeps insertion order for persistence while the set
+    # gives O(1) membership; evictions are mirrored so the set never needs a full rebuild.
+    max_seen = max(0, int(args.max_seen))
+    seen_raw = state.get("seen_trade_ids")
+    seen_ids: deque[str] = deque(seen_raw if isinstance(seen_raw, list) else [], maxlen=max_seen)
+    seen_set = set(seen_ids)
+    seen_added: list[str] = []
+    seen_pop = seen_ids.popleft
+    seen_append = seen_ids.append
+    seen_set_add = seen_set.add
+    seen_set_discard = seen_set.discard
+    seen_added_append = seen_added.append
+    touched_wallets_add = touched["wallets"].add
+    touched_events_add = touched["market_events"].add
 
     new_alerts: list[dict[str, Any]] = []
+    pending_alerts: list[tuple[str, Trade, WalletStats, int, list[str], float, dict[str, Any]]] = []
     latest_trade_by_market: dict[str, Trade] = {}
     latest_trade_by_market_wallet: dict[str, dict[str, Trade]] = {}
+    wallet_market_sets: dict[str, set[str]] = {}
     for trade in trades:
         trade_ts = int(trade.timestamp)
         if since_ts > 0:
@@ -606,25 +1062,28 @@ def main(argv: list[str] | None = None) -> int:
             continue
 
         notional = trade_notional_usd(trade)
-        seen_list.append(trade.trade_id)
-        seen_set.add(trade.trade_id)
-        max_seen = int(args.max_seen)
-        if len(seen_list) > max_seen:
-            del seen_list[: len(seen_list) - max_seen]
-            seen_set = set(seen_list)
+        if max_seen and len(seen_ids) == max_seen:
+            seen_set_discard(seen_pop())
+        seen_append(trade.trade_id)
+        seen_set_add(trade.trade_id)
+        seen_added_append(trade.trade_id)
 
         # Keep state small: only track trades that could ever alert.
-        if notional < float(args.min_notional):
+        if notional < min_notional:
             continue
 
-        _record_wallet_event(state, trade, notional=notional)
+        _record_wallet_event(
+            state, trade, notional=notional, market_sets=wallet_market_sets, now_ts=now_ts
+        )
+        touched_wallets_add(trade.proxy_wallet)
+        touched_events_add(trade.condition_id)
         _record_market_event(
             state,
             trade,
             notional=notional,
             now_ts=now_ts,
-            keep_seconds=int(args.market_events_keep_seconds),
-            max_events_per_market=int(args.market_events_max_per_market),
+            keep_seconds=market_events_keep_s,
+            max_events_per_market=max_events_per_market,
         )
 
         if trade.condition_id:
@@ -636,6 +1095,8 @@ def main(argv: list[str] | None = None) -> int:
             if prev_w is None or int(trade.timestamp) >= int(prev_w.timestamp):
                 per_wallet[trade.proxy_wallet] = trade
 
+    state["seen_trade_ids"] = list(seen_ids)
+
     if trades:
         max_trade_ts = max(int(t.timestamp) for t in trades)
         if max_trade_ts >= since_ts:
@@ -645,9 +1106,11 @@ def main(argv: list[str] | None = None) -> int:
                 checkpoint_ids |= since_trade_ids
             state["last_fetched_trade_ids"] = sorted(checkpoint_ids)[-2000:]
 
-    min_score = int(args.min_score)
-    fast_label = _window_label(int(args.fast_window_seconds))
-    accum_label = _window_label(int(args.accum_window_seconds))
+    # Wallet history is final once all trades are recorded, so a wallet that is the
+    # representative for several alerting markets only needs its stats computed once.
+    wallet_stats_cache: dict[str, WalletStats] = {}
+    fast_label = _window_label(fast_window_s)
+    accum_label = _window_label(accum_window_s)
     market_events = (
         state.get("market_events") if isinstance(state.get("market_events"), dict) else {}
     )
@@ -655,9 +1118,17 @@ def main(argv: list[str] | None = None) -> int:
         events = market_events.get(condition_id, [])
         if not isinstance(events, list):
             continue
+        ceiling, primary_possible = _score_ceiling(events)
+        if ceiling < min_score or (require_primary and not primary_possible):
+            continue
 
-        fast = _window_stats(events, since_ts=now_ts - int(args.fast_window_seconds))
-        accum = _window_stats(events, since_ts=now_ts - int(args.accum_window_seconds))
+        fast, accum = _window_stats_sorted(
+            events,
+            since_ts_list=[
+                now_ts - fast_window_s,
+                now_ts - accum_window_s,
+            ],
+        )
 
         reasons: list[str] = []
         fast_score = 0
@@ -731,16 +1202,17 @@ def main(argv: list[str] | None = None) -> int:
                     reasons.append(f"quiet_price_{accum_label}")
 
         score = fast_score + accum_score
-        if bool(args.require_primary_signal) and not has_primary_signal:
+        if require_primary and not has_primary_signal:
             continue
         if score < min_score:
             continue
 
         event_type = "fast_move" if fast_score >= accum_score else "accumulation"
         key = f"{event_type}:{condition_id}"
-        if not _cooldown_ok(state, key, cooldown_s=int(args.cooldown_seconds)):
+        if not _cooldown_ok(state, key, cooldown_s=cooldown_s, now_ts=now_ts):
             continue
-        _mark_alerted(state, key)
+        _mark_alerted(state, key, now_ts=now_ts)
+        touched["alerts"].add(key)
 
         rep_trade = trade
         if (
@@ -753,22 +1225,74 @@ def main(argv: list[str] | None = None) -> int:
                 or rep_trade
             )
 
-        wallet_stats = _wallet_stats_from_state(
-            state, rep_trade.proxy_wallet, min_notional=float(args.min_notional)
+        wallet_stats = wallet_stats_cache.get(rep_trade.proxy_wallet)
+        if wallet_stats is None:
+            wallet_stats = _wallet_stats_from_state(
+                state, rep_trade.proxy_wallet, min_notional=min_notional, now_ts=now_ts
+            )
+            wallet_stats_cache[rep_trade.proxy_wallet] = wallet_stats
+        alert_notional = fast_notional if event_type == "fast_move" else accum_top_net_notional
+        pending_alerts.append(
+            (
+                condition_id,
+                rep_trade,
+                wallet_stats,
+                score,
+                reasons,
+                alert_notional,
+                {
+                    "event_type": event_type,
+                    "fast_window_s": fast_window_s,
+                    "notional_fast_window": fast_notional,
+                    "unique_wallets_fast_window": fast_wallets,
+                    "price_range_fast_window": fast_price_range,
+                    "accum_window_s": accum_window_s,
+                    "top_wallet_accum_window": accum_top_wallet,
+                    "top_wallet_notional_accum_window": accum_top_notional,
+                    "top_wallet_share_accum_window": accum_top_share,
+                    "top_wallet_trades_accum_window": accum_top_trades,
+                    "top_net_wallet_accum_window": accum_top_net_wallet,
+                    "top_net_wallet_notional_accum_window": accum_top_net_notional,
+                    "top_net_wallet_direction_accum_window": accum_top_net_direction,
+                    "top_net_wallet_share_of_wallet_accum_window": accum_top_net_share_of_wallet,
+                    "top_net_wallet_share_of_market_accum_window": accum_top_net_share_of_market,
+                    "top_net_wallet_trades_accum_window": accum_top_net_trades,
+                    "price_range_accum_window": accum_price_range,
+                },
+            )
         )
-        market = _get_market(state, client, condition_id) if condition_id else None
+
+    # Market metadata is only needed for markets that cleared scoring and cooldown above.
+    markets_by_id = _get_markets(
+        state,
+        client,
+        [a[0] for a in pending_alerts if a[0]],
+        max_workers=int(args.market_fetch_workers),
+    )
+    for (
+        condition_id,
+        rep_trade,
+        wallet_stats,
+        score,
+        reasons,
+        alert_notional,
+        metrics,
+    ) in pending_alerts:
+        market = markets_by_id.get(condition_id) if condition_id else None
+        if market is not None:
+            touched["markets"].add(condition_id)
         _, ctx_reasons = score_trade(
             trade=rep_trade,
             notional=trade_notional_usd(rep_trade),
             wallet_stats=wallet_stats,
             market=market,
-            min_notional=float(args.min_notional),
+            min_notional=min_notional,
+            now_ts=now_ts,
         )
         for r in ctx_reasons:
             if r in {"new_wallet_to_system", "concentrated_activity_7d", "extreme_price"}:
                 reasons.append(r)
 
-        alert_notional = fast_notional if event_type == "fast_move" else accum_top_net_notional
         slug = rep_trade.slug or (market.slug if market else "")
         new_alerts.append(
             {
@@ -779,28 +1303,10 @@ def main(argv: list[str] | None = None) -> int:
                 "url": f"https://polymarket.com/market/{slug}"
                 if slug
                 else "https://polymarket.com",
-                "trade": asdict(rep_trade),
-                "wallet_stats": asdict(wallet_stats),
-                "market": (asdict(market) if market else None),
-                "metrics": {
-                    "event_type": event_type,
-                    "fast_window_s": int(args.fast_window_seconds),
-                    "notional_fast_window": fast_notional,
-                    "unique_wallets_fast_window": fast_wallets,
-                    "price_range_fast_window": fast_price_range,
-                    "accum_window_s": int(args.accum_window_seconds),
-                    "top_wallet_accum_window": accum_top_wallet,
-                    "top_wallet_notional_accum_window": accum_top_notional,
-                    "top_wallet_share_accum_window": accum_top_share,
-                    "top_wallet_trades_accum_window": accum_top_trades,
-                    "top_net_wallet_accum_window": accum_top_net_wallet,
-                    "top_net_wallet_notional_accum_window": accum_top_net_notional,
-                    "top_net_wallet_direction_accum_window": accum_top_net_direction,
-                    "top_net_wallet_share_of_wallet_accum_window": accum_top_net_share_of_wallet,
-                    "top_net_wallet_share_of_market_accum_window": accum_top_net_share_of_market,
-                    "top_net_wallet_trades_accum_window": accum_top_net_trades,
-                    "price_range_accum_window": accum_price_range,
-                },
+                "trade": trade_to_dict(rep_trade),
+                "wallet_stats": wallet_stats_to_dict(wallet_stats),
+                "market": (market_to_dict(market) if market else None),
+                "metrics": metrics,
             }
         )
 
@@ -809,33 +1315,23 @@ def main(argv: list[str] | None = None) -> int:
     prev_alerts = existing.get("alerts") if isinstance(existing, dict) else None
     if not isinstance(prev_alerts, list):
         prev_alerts = []
+    prev_feed = prev_alerts
 
-    min_notional = float(args.min_notional)
-    prev_filtered: list[dict[str, Any]] = []
-    for a in prev_alerts:
-        if not isinstance(a, dict):
-            continue
-        try:
-            if float(a.get("notional", 0.0) or 0.0) >= min_notional:
-                prev_filtered.append(a)
-        except Exception:
-            continue
-    prev_alerts = prev_filtered
+    prev_alerts = [
+        a
+        for a in prev_alerts
+        if isinstance(a, dict) and _alert_notional(a.get("notional")) >= min_notional
+    ]
     combined: list[dict[str, Any]] = []
     seen_alerts: set[tuple[str, str, str]] = set()
-    for a in new_alerts + prev_alerts:
-        if not isinstance(a, dict):
-            continue
+    for a in chain(new_alerts, prev_alerts):
         key = _alert_dedupe_key(a)
         if key in seen_alerts:
             continue
         seen_alerts.add(key)
         combined.append(a)
-    combined_sorted = sorted(
-        combined,
-        key=lambda a: int(a.get("trade", {}).get("timestamp", 0) or 0),
-        reverse=True,
-    )
+    alert_ts = {id(a): _alert_ts(a) for a in combined}
+    combined_sorted = sorted(combined, key=lambda a: alert_ts[id(a)], reverse=True)
 
     max_per_day = int(args.max_alerts_per_day)
     if max_per_day > 0:
@@ -852,101 +1348,67 @@ def main(argv: list[str] | None = None) -> int:
     server_url = os.environ.get("GITHUB_SERVER_URL", "https://github.com").rstrip("/")
     run_url = f"{server_url}/{repo}/actions/runs/{run_id}" if repo and run_id else ""
 
-    payload = {
+    meta = {
         "generated_at": _now_ts(),
         "repo": repo,
-        "alerts": combined_sorted,
         "new_alerts": new_in_feed,
         "workflow_run_id": run_id,
         "workflow_run_url": run_url,
     }
 
-    _atomic_write(out_path, json.dumps(payload, indent=2, sort_keys=True) + "\n")
-    for_alerts_jsonl = sorted(
-        combined_sorted,
-        key=lambda a: int(a.get("trade", {}).get("timestamp", 0) or 0),
-    )
-    _atomic_write(
-        out_jsonl_path, "\n".join(json.dumps(x, sort_keys=True) for x in for_alerts_jsonl) + "\n"
-    )
+    # Each alert is encoded once; the JSON feed, the JSONL feed and the archive share the text.
+    encoded = {id(a): _JSON_SORTED.encode(a) for a in combined_sorted}
+    for a in new_alerts:
+        if id(a) not in encoded:
+            encoded[id(a)] = _JSON_SORTED.encode(a)
+
+    _atomic_write(out_path, _render_feed(meta, [encoded[id(a)] for a in combined_sorted]))
+    # The feed is newest-first; the JSONL feed is the same list oldest-first.
+    for_alerts_jsonl = combined_sorted[::-1]
+    # Both feeds are written from the same list, so on a no-op run (nothing new, merged feed
+    # identical to the previous one) the JSONL feed can't have changed either.
+    if new_alerts or combined_sorted != prev_feed or not out_jsonl_path.exists():
+        _sync_text(out_jsonl_path, "\n".join(encoded[id(x)] for x in for_alerts_jsonl) + "\n")
 
     # Append new alerts to an archive so we don't lose history as the public feed is capped.
-    archive_batches: dict[Path, list[str]] = {}
-    for a in new_alerts:
-        ts = int(a.get("trade", {}).get("timestamp", 0) or 0)
-        path = _archive_path(archive_dir, ts if ts > 0 else _now_ts())
-        archive_batches.setdefault(path, []).append(json.dumps(a, sort_keys=True))
-    for path, lines in archive_batches.items():
-        _append_lines(path, lines)
+    if archive_dir is not None:
+        archive_batches: dict[Path, list[str]] = {}
+        for a in new_alerts:
+            ts = _alert_ts(a)
+            path = _archive_path(archive_dir, ts if ts > 0 else _now_ts())
+            archive_batches.setdefault(path, []).append(encoded[id(a)])
+        for path, lines in archive_batches.items():
+            _append_lines(path, lines)
 
     # Keep state small-ish.
     state["updated_at"] = _now_ts()
 
-    keep_wallets = {str(a.get("trade", {}).get("proxy_wallet", "")) for a in combined_sorted}
-    keep_markets = {str(a.get("trade", {}).get("condition_id", "")) for a in combined_sorted}
-    cutoff = _now_ts() - int(args.state_keep_seconds)
-
-    wallets = state.get("wallets")
-    if isinstance(wallets, dict):
-        for k in list(wallets.keys()):
-            if k in keep_wallets:
-                continue
-            w = wallets.get(k)
-            if not isinstance(w, dict):
-                wallets.pop(k, None)
-                continue
-            last_seen = w.get("last_seen_ts")
-            if last_seen is None:
-                events = w.get("events") or []
-                if isinstance(events, list) and events:
-                    try:
-                        last_seen = int(events[-1][0])
-                    except Exception:
-                        last_seen = None
-            if last_seen is None or int(last_seen) < cutoff:
-                wallets.pop(k, None)
-
-    markets = state.get("markets")
-    if isinstance(markets, dict):
-        for k in list(markets.keys()):
-            if k not in keep_markets:
-                markets.pop(k, None)
-
-    alerts = state.get("alerts")
-    if isinstance(alerts, dict):
-        for k in list(alerts.keys()):
-            try:
-                if int(alerts.get(k, 0)) < cutoff:
-                    alerts.pop(k, None)
-            except Exception:
-                alerts.pop(k, None)
-
-    market_events = state.get("market_events")
-    if isinstance(market_events, dict):
-        event_cutoff = _now_ts() - int(args.market_events_keep_seconds)
-        for k in list(market_events.keys()):
-            v = market_events.get(k)
-            if not isinstance(v, list):
-                market_events.pop(k, None)
-                continue
-            pruned: list[list[Any]] = []
-            for e in v:
-                if not isinstance(e, list) or len(e) < 4:
-                    continue
-                try:
-                    if int(e[0]) >= event_cutoff:
-                        pruned.append(e)
-                except Exception:
-                    continue
-            if not pruned and k not in keep_markets:
-                market_events.pop(k, None)
-                continue
-            if len(pruned) > int(args.market_events_max_per_market):
-                pruned = pruned[-int(args.market_events_max_per_market) :]
-            market_events[k] = pruned
-            keep_markets.add(k)
+    keep_wallets: set[str] = set()
+    keep_markets: set[str] = set()
+    for a in combined_sorted:
+        trade = a.get("trade")
+        trade_obj = trade if isinstance(trade, dict) else {}
+        keep_wallets.add(str(trade_obj.get("proxy_wallet", "")))
+        keep_markets.add(str(trade_obj.get("condition_id", "")))
+    _prune_state(
+        state,
+        now_ts=_now_ts(),
+        keep_seconds=int(args.state_keep_seconds),
+        market_events_keep_seconds=market_events_keep_s,
+        max_events_per_market=max_events_per_market,
+        keep_wallets=keep_wallets,
+        keep_markets=keep_markets,
+        touched_events=touched["market_events"],
+    )
 
-    _atomic_write(state_path, json.dumps(state, indent=2, sort_keys=True) + "\n")
+    delta = _state_delta(
+        state,
+        keys_before=state_keys_before,
+        touched=touched,
+        seen_added=seen_added,
+        seen_max=max_seen,
+    )
+    _save_state(state, state_path, delta=delta, max_log_bytes=int(args.state_log_max_bytes))
     return 0
 
 
@@ -1,48 +1,81 @@
 from __future__ import annotations
 
-import datetime as dt
 import json
-from dataclasses import asdict
+import time
+from dataclasses import fields
 from typing import Any
 
 from polymarket_watch.http import HttpClient
+from polymarket_watch.polymarket import Market, Trade
 from polymarket_watch.scoring import Alert
+from polymarket_watch.store import WalletStats
+
+# These dataclasses are flat, so a field-name comprehension gives the same dict as
+# `dataclasses.asdict` without its recursive deep copy.
+_TRADE_FIELDS = tuple(f.name for f in fields(Trade))
+_WALLET_STATS_FIELDS = tuple(f.name for f in fields(WalletStats))
+_MARKET_FIELDS = tuple(f.name for f in fields(Market))
+_JSON_COMPACT = json.JSONEncoder(separators=(",", ":"), sort_keys=True)
 
 
 def _ts_iso(ts: int) -> str:
-    return dt.datetime.fromtimestamp(ts, tz=dt.timezone.utc).isoformat()
+    # Same text as `datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()` for whole seconds.
+    return "%04d-%02d-%02dT%02d:%02d:%02d+00:00" % time.gmtime(ts)[:6]
 
 
 def render_text(alert: Alert) -> str:
-    wallet = alert.trade.proxy_wallet
-    ident = alert.trade.pseudonym or alert.trade.name or wallet
-    market_title = alert.trade.title or (alert.market.question if alert.market else "")
+    t = alert.trade
+    ws = alert.wallet_stats
+    market = alert.market
+    wallet = t.proxy_wallet
+    ident = t.pseudonym or t.name or wallet
+    market_title = t.title or (market.question if market else "")
     lines = [
-        f"ALERT score={alert.score} notional=${alert.notional:,.2f}",
-        f"wallet={wallet} ({ident})",
-        f"side={alert.trade.side} outcome={alert.trade.outcome} price={alert.trade.price} size={alert.trade.size}",
-        f"market={market_title}",
-        f"url={alert.url}",
-        f"ts={_ts_iso(alert.trade.timestamp)} tx={alert.trade.transaction_hash}",
+        "ALERT score=%s notional=$%s" % (alert.score, format(alert.notional, ",.2f")),
+        "wallet=%s (%s)" % (wallet, ident),
+        "side=%s outcome=%s price=%s size=%s" % (t.side, t.outcome, t.price, t.size),
+        "market=%s" % (market_title,),
+        "url=%s" % (alert.url,),
+        "ts=%s tx=%s" % (_ts_iso(t.timestamp), t.transaction_hash),
         "reasons=" + ",".join(alert.reasons),
-        (
-            "wallet_stats="
-            f"trades_total={alert.wallet_stats.trades_total} "
-            f"unique_markets_total={alert.wallet_stats.unique_markets_total} "
-            f"trades_7d={alert.wallet_stats.trades_7d} "
-            f"unique_markets_7d={alert.wallet_stats.unique_markets_7d} "
-            f"avg_notional_7d=${alert.wallet_stats.avg_notional_7d:,.2f}"
+        "wallet_stats=trades_total=%s unique_markets_total=%s trades_7d=%s "
+        "unique_markets_7d=%s avg_notional_7d=$%s"
+        % (
+            ws.trades_total,
+            ws.unique_markets_total,
+            ws.trades_7d,
+            ws.unique_markets_7d,
+            format(ws.avg_notional_7d, ",.2f"),
         ),
     ]
-    if alert.market:
-        lines.append(
-            "market_stats="
-            f"liquidity=${(alert.market.liquidity_num or 0):,.2f} "
-            f"volume24hr=${(alert.market.volume24hr or 0):,.2f}"
-        )
+    if market:
+        lines.append(_render_market_stats(market))
     return "\n".join(lines)
 
 
+def _render_market_stats(market: Market) -> str:
+    return "market_stats=liquidity=$%s volume24hr=$%s" % (
+        format(market.liquidity_num or 0, ",.2f"),
+        format(market.volume24hr or 0, ",.2f"),
+    )
+
+
+def trade_to_dict(trade: Trade) -> dict[str, Any]:
+    return {name: getattr(trade, name) for name in _TRADE_FIELDS}
+
+
+def wallet_stats_to_dict(stats: WalletStats) -> dict[str, Any]:
+    return {name: getattr(stats, name) for name in _WALLET_STATS_FIELDS}
+
+
+def market_to_dict(market: Market) -> dict[str, Any]:
+    out = {name: getattr(market, name) for name in _MARKET_FIELDS}
+    # Copy the outcome lists so callers can't mutate the (frozen) market through the dict.
+    out["outcomes"] = list(market.outcomes)
+    out["outcome_prices"] = list(market.outcome_prices)
+    return out
+
+
 def render_json(alert: Alert) -> str:
     payload: dict[str, Any] = {
         "type": "alert",
@@ -50,11 +83,11 @@ def render_json(alert: Alert) -> str:
         "reasons": alert.reasons,
         "notional": alert.notional,
         "url": alert.url,
-        "trade": asdict(alert.trade),
-        "wallet_stats": asdict(alert.wallet_stats),
-        "market": asdict(alert.market) if alert.market else None,
+        "trade": trade_to_dict(alert.trade),
+        "wallet_stats": wallet_stats_to_dict(alert.wallet_stats),
+        "market": market_to_dict(alert.market) if alert.market else None,
     }
-    return json.dumps(payload, separators=(",", ":"), sort_keys=True)
+    return _JSON_COMPACT.encode(payload)
 
 
 class DiscordAlerter:
@@ -62,6 +95,9 @@ class DiscordAlerter:
         self._webhook_url = webhook_url
         self._http = http or HttpClient()
 
+    def close(self) -> None:
+        self._http.close()
+
     def send(self, alert: Alert) -> None:
         content = render_text(alert)
         # Discord: keep it simple; users can switch to embeds later.
@@ -4,16 +4,19 @@ import argparse
 import logging
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from polymarket_watch.alerts import DiscordAlerter, render_json, render_text
 from polymarket_watch.logging_json import log, setup_logging
-from polymarket_watch.polymarket import PolymarketClient
-from polymarket_watch.scoring import build_alert, trade_notional_usd
+from polymarket_watch.polymarket import PolymarketClient, Trade
+from polymarket_watch.scoring import Alert, build_alert, trade_notional_usd
 from polymarket_watch.store import Store
 
 
 logger = logging.getLogger("pmwatch")
 
+_MARKET_FETCH_WORKERS = 8
+
 
 def _add_common_args(p: argparse.ArgumentParser) -> None:
     p.add_argument("--db", default="pmwatch.db", help="SQLite DB path (state + history).")
@@ -36,6 +39,22 @@ def _add_common_args(p: argparse.ArgumentParser) -> None:
     p.add_argument("--log-level", default="INFO", help="Log level (INFO, DEBUG, ...).")
 
 
+def _prefetch_markets(
+    store: Store, client: PolymarketClient, condition_ids: list[str], now_ts: int | None = None
+) -> None:
+    # Market lookups are independent HTTP calls, so overlap them; SQLite writes stay on this
+    # thread.
+    if not condition_ids:
+        return
+    workers = min(_MARKET_FETCH_WORKERS, len(condition_ids))
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        markets = list(ex.map(client.get_market_by_condition_id, condition_ids))
+    with store.transaction():
+        for market in markets:
+            if market is not None:
+                store.upsert_market(market, now_ts=now_ts)
+
+
 def _run_once(
     *,
     store: Store,
@@ -45,50 +64,72 @@ def _run_once(
     min_score: int,
     cooldown_seconds: int,
     out_format: str,
-    discord_webhook_url: str,
+    alerter: DiscordAlerter | None,
 ) -> int:
     trades = client.get_recent_trades(limit=limit, offset=0)
     if not trades:
         log(logger, logging.INFO, "no_trades")
         return 0
 
-    alerter = DiscordAlerter(discord_webhook_url) if discord_webhook_url else None
+    # One clock reading per poll keeps scoring and cooldowns consistent across its trades.
+    now_ts = int(time.time())
 
     # Process chronologically to preserve time order.
     trades_sorted = sorted(trades, key=lambda t: (t.timestamp, t.trade_id))
-    emitted = 0
-    for trade in trades_sorted:
-        if store.has_trade(trade.trade_id):
-            continue
-
-        notional = trade_notional_usd(trade)
-        store.record_trade(trade, notional=notional)
-
-        wallet_stats = store.wallet_stats(trade.proxy_wallet)
-
-        market = store.get_market(trade.condition_id)
-        if market is None and trade.condition_id:
-            market = client.get_market_by_condition_id(trade.condition_id)
-            if market is not None:
-                store.upsert_market(market)
-
-        alert = build_alert(
-            trade=trade,
-            wallet_stats=wallet_stats,
-            market=market,
-            min_notional=min_notional,
-            min_score=min_score,
-        )
-        if alert is None:
-            continue
+    seen = store.existing_trade_ids([t.trade_id for t in trades_sorted])
+    new_trades: list[Trade] = []
+    for t in trades_sorted:
+        if t.trade_id not in seen:
+            seen.add(t.trade_id)
+            new_trades.append(t)
+    needed = sorted({t.condition_id for t in new_trades if t.condition_id})
+    markets = store.get_markets_many(needed)
+    missing = [cid for cid in needed if cid not in markets]
+    if missing:
+        _prefetch_markets(store, client, missing, now_ts=now_ts)
+        markets.update(store.get_markets_many(missing))
+
+    # Wallet aggregates for every wallet in this poll are loaded with one grouped query, then
+    # advanced in Python as trades are recorded instead of re-querying per trade.
+    tallies = store.wallet_tallies([t.proxy_wallet for t in new_trades], now_ts=now_ts)
+    # All of the poll's writes share one transaction (one commit); alerts are emitted after it
+    # commits so webhook latency never holds the write lock.
+    to_emit: list[Alert] = []
+    with store.transaction():
+        # Stats come from the tallies (loaded above), so the whole batch can be inserted up front.
+        priced = [(t, trade_notional_usd(t)) for t in new_trades]
+        store.record_trades(priced)
+        for trade, notional in priced:
+            tally = tallies[trade.proxy_wallet]
+            tally.add(trade, notional)
+            # Below the notional gate `build_alert` always declines, so don't build its inputs.
+            if notional < min_notional:
+                continue
+
+            wallet_stats = tally.stats()
+
+            market = markets.get(trade.condition_id)
+
+            alert = build_alert(
+                trade=trade,
+                wallet_stats=wallet_stats,
+                market=market,
+                min_notional=min_notional,
+                min_score=min_score,
+                now_ts=now_ts,
+            )
+            if alert is None:
+                continue
 
-        alert_key = f"{trade.proxy_wallet}:{trade.condition_id}"
-        if not store.should_alert(alert_key, cooldown_seconds):
-            continue
+            alert_key = f"{trade.proxy_wallet}:{trade.condition_id}"
+            if not store.should_alert(alert_key, cooldown_seconds, now_ts=now_ts):
+                continue
 
-        store.mark_alerted(alert_key)
-        emitted += 1
+            store.mark_alerted(alert_key, now_ts=now_ts)
+            to_emit.append(alert)
 
+    emitted = len(to_emit)
+    for alert in to_emit:
         if out_format == "json":
             print(render_json(alert))
         else:
@@ -120,6 +161,8 @@ def main(argv: list[str] | None = None) -> int:
 
     store = Store(args.db)
     client = PolymarketClient()
+    # Built once so the webhook's keep-alive connection is reused across polls.
+    alerter = DiscordAlerter(args.discord_webhook_url) if args.discord_webhook_url else None
     try:
         limit = min(int(args.limit), 500)
         if int(args.limit) != limit:
@@ -133,11 +176,12 @@ def main(argv: list[str] | None = None) -> int:
                 min_score=args.min_score,
                 cooldown_seconds=args.cooldown_seconds,
                 out_format=args.format,
-                discord_webhook_url=args.discord_webhook_url,
+                alerter=alerter,
             )
             return 0
 
         while True:
+            started = time.monotonic()
             try:
                 _run_once(
                     store=store,
@@ -147,15 +191,21 @@ def main(argv: list[str] | None = None) -> int:
                     min_score=args.min_score,
                     cooldown_seconds=args.cooldown_seconds,
                     out_format=args.format,
-                    discord_webhook_url=args.discord_webhook_url,
+                    alerter=alerter,
                 )
             except Exception as e:
                 log(logger, logging.ERROR, "watch_iteration_failed", error=str(e))
-            time.sleep(float(args.poll_seconds))
+            # Poll on a steady cadence: time spent blocked on the network during the poll counts
+            # toward the interval instead of being added on top of it.
+            elapsed = time.monotonic() - started
+            time.sleep(max(0.0, float(args.poll_seconds) - elapsed))
     except KeyboardInterrupt:
         log(logger, logging.INFO, "shutdown")
         return 0
     finally:
+        if alerter:
+            alerter.close()
+        client.close()
         store.close()
 
 
@@ -1,15 +1,34 @@
 from __future__ import annotations
 
+import base64
+import gzip
+import http.client
+import io
 import json
+import threading
 import time
 import urllib.error
 import urllib.parse
 import urllib.request
+import zlib
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any
 
+try:
+    import orjson as _orjson
+except ImportError:  # pragma: no cover - optional speedup
+    _orjson = None
 
-@dataclass(frozen=True)
+
+# Errors that mean a reused keep-alive socket was already closed by the server before it read the
+# request. Timeouts are deliberately absent: by then the request may have been received.
+_STALE_SOCKET_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+_MAX_REDIRECTS = 5
+
+
+@dataclass(frozen=True, slots=True)
 class HttpConfig:
     user_agent: str = "polymarket-watch/0.1.0"
     timeout_s: float = 10.0
@@ -17,47 +36,173 @@ class HttpConfig:
     max_retries: int = 3
 
 
+@lru_cache(maxsize=256)
+def _validated_url(url: str) -> str:
+    # Callers hit the same few endpoint URLs over and over, so parse each one only once.
+    parsed = urllib.parse.urlparse(url)
+    if parsed.scheme.lower() != "https":
+        raise ValueError("only https:// URLs are allowed")
+    if not parsed.netloc:
+        raise ValueError("URL must include a hostname")
+    return url
+
+
+def _json_loads(body: bytes) -> Any:
+    # orjson (when installed) parses response bodies straight from bytes; fall back for inputs
+    # it rejects but the stdlib accepts (NaN/Infinity, >64-bit ints).
+    if _orjson is not None:
+        try:
+            return _orjson.loads(body)
+        except ValueError:
+            pass
+    return json.loads(body)
+
+
+def _connect(host: str, timeout: float) -> http.client.HTTPSConnection:
+    # Honour HTTPS_PROXY / NO_PROXY the way urllib's ProxyHandler does: dial the proxy and CONNECT
+    # through it to `host`, so TLS still runs end to end with the origin.
+    proxy = urllib.request.getproxies().get("https")
+    if not proxy or urllib.request.proxy_bypass(host):
+        return http.client.HTTPSConnection(host, timeout=timeout)
+    parsed = urllib.parse.urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+    conn = http.client.HTTPSConnection(parsed.hostname or "", parsed.port or 80, timeout=timeout)
+    headers = {}
+    if parsed.username:
+        user = urllib.parse.unquote(parsed.username)
+        password = urllib.parse.unquote(parsed.password or "")
+        token = base64.b64encode(f"{user}:{password}".encode()).decode("ascii")
+        headers["Proxy-Authorization"] = f"Basic {token}"
+    conn.set_tunnel(host, headers=headers)
+    return conn
+
+
 class RateLimiter:
     def __init__(self, min_interval_s: float) -> None:
         self._min_interval_s = max(0.0, min_interval_s)
         self._last_request_at = 0.0
+        self._lock = threading.Lock()
 
     def wait(self) -> None:
-        now = time.monotonic()
-        sleep_s = self._min_interval_s - (now - self._last_request_at)
-        if sleep_s > 0:
-            time.sleep(sleep_s)
-        self._last_request_at = time.monotonic()
+        # Reserve the next slot under the lock, then sleep outside it so concurrent callers
+        # queue up at `min_interval_s` spacing instead of serializing on the sleep.
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._last_request_at + self._min_interval_s)
+            self._last_request_at = slot
+        if slot > now:
+            time.sleep(slot - now)
 
 
 class HttpClient:
     def __init__(self, config: HttpConfig | None = None) -> None:
         self._config = config or HttpConfig()
         self._limiter = RateLimiter(self._config.min_interval_s)
+        # Idle keep-alive connections per host. A connection is checked out for the duration of
+        # one request, so concurrent callers each get their own socket.
+        self._idle: dict[str, list[http.client.HTTPSConnection]] = {}
+        self._pool_lock = threading.Lock()
+
+    def close(self) -> None:
+        with self._pool_lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def _checkout(self, host: str, timeout: float) -> tuple[http.client.HTTPSConnection, bool]:
+        with self._pool_lock:
+            conns = self._idle.get(host)
+            if conns:
+                return conns.pop(), True
+        return _connect(host, timeout), False
+
+    def _checkin(self, host: str, conn: http.client.HTTPSConnection) -> None:
+        with self._pool_lock:
+            self._idle.setdefault(host, []).append(conn)
+
+    def _urlopen(self, req: urllib.request.Request, timeout: float) -> io.BytesIO:
+        # Same contract as `urllib.request.urlopen` (HTTPError for error statuses, URLError for
+        # transport failures), but over a pooled connection so repeat calls to a host skip the
+        # TCP + TLS handshake; urllib always sends `Connection: close`.
+        for _ in range(_MAX_REDIRECTS + 1):
+            resp, body = self._send(req, timeout)
+            if not 300 <= resp.status < 400:
+                break
+            # Redirects are rare for these APIs. Follow them for GETs only (a POST has already
+            # been delivered once), and hold the target to the same https-only rule.
+            location = resp.getheader("Location", "")
+            if req.get_method() != "GET" or not location:
+                break
+            try:
+                url = _validated_url(urllib.parse.urljoin(req.full_url, location))
+            except ValueError:
+                break
+            req = urllib.request.Request(url, headers=dict(req.header_items()))
+        if resp.status >= 300:
+            raise urllib.error.HTTPError(
+                req.full_url, resp.status, resp.reason, resp.headers, io.BytesIO(body)
+            )
+        return io.BytesIO(body)
+
+    def _send(
+        self, req: urllib.request.Request, timeout: float
+    ) -> tuple[http.client.HTTPResponse, bytes]:
+        parts = urllib.parse.urlsplit(req.full_url)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        method = req.get_method()
+        headers = dict(req.header_items())
+        # JSON compresses well; trade pages shrink several-fold on the wire.
+        headers.setdefault("Accept-Encoding", "gzip")
+        conn, reused = self._checkout(parts.netloc, timeout)
+        try:
+            try:
+                conn.request(method, target, body=req.data, headers=headers)
+                resp = conn.getresponse()
+            except _STALE_SOCKET_ERRORS:
+                # The server dropped the idle keep-alive socket before answering, so the request
+                # never got through. Resend once on a fresh connection, but only for GETs: a
+                # webhook POST must not risk going out twice.
+                if not reused or method != "GET":
+                    raise
+                conn.close()
+                conn = _connect(parts.netloc, timeout)
+                conn.request(method, target, body=req.data, headers=headers)
+                resp = conn.getresponse()
+            body = resp.read()
+            if resp.getheader("Content-Encoding", "").lower() == "gzip":
+                body = gzip.decompress(body)
+        except (http.client.HTTPException, OSError, EOFError, zlib.error) as e:
+            # EOFError / zlib.error: a truncated or corrupt gzip body, which is not an OSError.
+            conn.close()
+            raise urllib.error.URLError(e) from e
+        if resp.will_close or resp.status >= 400:
+            # Don't pool a socket after an error status: servers often drop or wedge it.
+            conn.close()
+        else:
+            self._checkin(parts.netloc, conn)
+        return resp, body
 
     @staticmethod
     def _validate_url(url: str) -> str:
-        parsed = urllib.parse.urlparse(url)
-        if parsed.scheme.lower() != "https":
-            raise ValueError("only https:// URLs are allowed")
-        if not parsed.netloc:
-            raise ValueError("URL must include a hostname")
-        return url
+        return _validated_url(url)
 
     def get_json(self, url: str, params: dict[str, Any] | None = None) -> Any:
+        # Validate the endpoint before appending the query: the query can't change the scheme or
+        # host, and the bare endpoint is what repeats across calls (so the check is cached).
+        url = self._validate_url(url)
         if params:
             query = urllib.parse.urlencode(params, doseq=True)
             url = f"{url}?{query}"
-        url = self._validate_url(url)
         req = urllib.request.Request(url, headers={"User-Agent": self._config.user_agent})
 
         last_exc: Exception | None = None
         for attempt in range(self._config.max_retries + 1):
             self._limiter.wait()
             try:
-                with urllib.request.urlopen(req, timeout=self._config.timeout_s) as resp:  # nosec B310
-                    body = resp.read().decode("utf-8")
-                    return json.loads(body)
+                with self._urlopen(req, timeout=self._config.timeout_s) as resp:
+                    return _json_loads(resp.read())
             except urllib.error.HTTPError as e:
                 last_exc = e
                 status = getattr(e, "code", None)
@@ -93,5 +238,5 @@ class HttpClient:
             method="POST",
         )
         self._limiter.wait()
-        with urllib.request.urlopen(req, timeout=self._config.timeout_s):  # nosec B310
+        with self._urlopen(req, timeout=self._config.timeout_s):
             return
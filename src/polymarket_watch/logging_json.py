@@ -7,6 +7,11 @@ import time
 from typing import Any, Mapping
 
 
+# Built once: `json.dumps` with options constructs a new encoder for every log line. Keys are
+# not sorted; the payload is built in a fixed order (ts, level, logger, message, fields).
+_ENCODER = json.JSONEncoder(separators=(",", ":"))
+
+
 class JsonFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord) -> str:
         payload: dict[str, Any] = {
@@ -18,7 +23,7 @@ class JsonFormatter(logging.Formatter):
         fields = getattr(record, "fields", None)
         if isinstance(fields, Mapping):
             payload["fields"] = dict(fields)
-        return json.dumps(payload, separators=(",", ":"), sort_keys=True)
+        return _ENCODER.encode(payload)
 
 
 def setup_logging(level: str = "INFO") -> None:
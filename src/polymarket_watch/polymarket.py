@@ -12,7 +12,7 @@ from polymarket_watch.http import HttpClient
 Side = Literal["BUY", "SELL"]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Trade:
     trade_id: str
     proxy_wallet: str
@@ -32,7 +32,7 @@ class Trade:
     pseudonym: str | None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Market:
     condition_id: str
     question: str
@@ -88,6 +88,9 @@ class PolymarketClient:
         self._gamma_base = gamma_base.rstrip("/")
         self._data_base = data_base.rstrip("/")
 
+    def close(self) -> None:
+        self._http.close()
+
     def get_recent_trades(self, limit: int = 200, offset: int = 0) -> list[Trade]:
         raw = self._http.get_json(
             f"{self._data_base}/trades",
@@ -99,26 +102,29 @@ class PolymarketClient:
         for item in raw:
             if not isinstance(item, dict):
                 continue
-            side_raw = str(item.get("side", "")).upper()
+            get = item.get
+            side_raw = str(get("side", "")).upper()
             side: Side = side_raw if side_raw in {"BUY", "SELL"} else "BUY"
+            name = get("name")
+            pseudonym = get("pseudonym")
             trades.append(
                 Trade(
                     trade_id=_stable_trade_id(item),
-                    proxy_wallet=str(item.get("proxyWallet", "")),
+                    proxy_wallet=str(get("proxyWallet", "")),
                     side=side,
-                    asset=str(item.get("asset", "")),
-                    condition_id=str(item.get("conditionId", "")),
-                    size=_to_float(item.get("size", 0.0)),
-                    price=_to_float(item.get("price", 0.0)),
-                    timestamp=_to_int(item.get("timestamp", 0)),
-                    title=str(item.get("title", "")),
-                    slug=str(item.get("slug", "")),
-                    event_slug=str(item.get("eventSlug", "")),
-                    outcome=str(item.get("outcome", "")),
-                    outcome_index=_to_int(item.get("outcomeIndex", -1), default=-1),
-                    transaction_hash=str(item.get("transactionHash", "")),
-                    name=str(item.get("name")) if item.get("name") else None,
-                    pseudonym=str(item.get("pseudonym")) if item.get("pseudonym") else None,
+                    asset=str(get("asset", "")),
+                    condition_id=str(get("conditionId", "")),
+                    size=_to_float(get("size", 0.0)),
+                    price=_to_float(get("price", 0.0)),
+                    timestamp=_to_int(get("timestamp", 0)),
+                    title=str(get("title", "")),
+                    slug=str(get("slug", "")),
+                    event_slug=str(get("eventSlug", "")),
+                    outcome=str(get("outcome", "")),
+                    outcome_index=_to_int(get("outcomeIndex", -1), default=-1),
+                    transaction_hash=str(get("transactionHash", "")),
+                    name=str(name) if name else None,
+                    pseudonym=str(pseudonym) if pseudonym else None,
                 )
             )
         return trades
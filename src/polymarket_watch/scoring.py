@@ -7,7 +7,7 @@ from polymarket_watch.polymarket import Market, Trade
 from polymarket_watch.store import WalletStats
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Alert:
     score: int
     reasons: list[str]
@@ -34,6 +34,7 @@ def score_trade(
     wallet_stats: WalletStats,
     market: Market | None,
     min_notional: float,
+    now_ts: int | None = None,
 ) -> tuple[int, list[str]]:
     score = 0
     reasons: list[str] = []
@@ -76,7 +77,8 @@ def score_trade(
         reasons.append("extreme_price")
 
     # If the trade timestamp is very recent, prioritize alerting quickly (no extra score; just reason).
-    if int(time.time()) - int(trade.timestamp) <= 60:
+    now = int(time.time()) if now_ts is None else now_ts
+    if now - int(trade.timestamp) <= 60:
         reasons.append("recent_trade")
 
     return score, reasons
@@ -89,16 +91,21 @@ def build_alert(
     market: Market | None,
     min_notional: float,
     min_score: int,
+    now_ts: int | None = None,
 ) -> Alert | None:
     notional = trade_notional_usd(trade)
+    # Small trades never alert whatever they score, so skip the scoring work for them.
+    if notional < min_notional:
+        return None
     score, reasons = score_trade(
         trade=trade,
         notional=notional,
         wallet_stats=wallet_stats,
         market=market,
         min_notional=min_notional,
+        now_ts=now_ts,
     )
-    if notional < min_notional or score < min_score:
+    if score < min_score:
         return None
     return Alert(
         score=score,
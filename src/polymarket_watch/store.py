@@ -3,12 +3,63 @@ from __future__ import annotations
 import json
 import sqlite3
 import time
-from dataclasses import dataclass
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 
 from polymarket_watch.polymarket import Market, Trade
 
+_INSERT_TRADE_SQL = """
+    INSERT OR IGNORE INTO trades(
+      trade_id, ts, proxy_wallet, condition_id, slug, title,
+      side, outcome, outcome_index, size, price, notional, transaction_hash
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
 
-@dataclass(frozen=True)
+# Stay under SQLite's default bound-parameter limit (SQLITE_MAX_VARIABLE_NUMBER) for IN-lists.
+_IN_CHUNK = 900
+
+_MARKET_CACHE_SIZE = 2048
+
+
+def _trade_row(trade: Trade, notional: float) -> tuple[object, ...]:
+    return (
+        trade.trade_id,
+        trade.timestamp,
+        trade.proxy_wallet,
+        trade.condition_id,
+        trade.slug,
+        trade.title,
+        trade.side,
+        trade.outcome,
+        trade.outcome_index,
+        trade.size,
+        trade.price,
+        notional,
+        trade.transaction_hash,
+    )
+
+
+def _market_from_row(row: sqlite3.Row) -> Market:
+    try:
+        outcomes = json.loads(row["outcomes_json"])
+        prices = json.loads(row["outcome_prices_json"])
+    except Exception:
+        outcomes = []
+        prices = []
+    return Market(
+        condition_id=row["condition_id"],
+        question=row["question"],
+        slug=row["slug"],
+        liquidity_num=row["liquidity_num"],
+        volume24hr=row["volume24hr"],
+        outcomes=[str(x) for x in outcomes] if isinstance(outcomes, list) else [],
+        outcome_prices=[float(x) for x in prices] if isinstance(prices, list) else [],
+    )
+
+
+@dataclass(frozen=True, slots=True)
 class WalletStats:
     proxy_wallet: str
     first_seen_ts: int | None
@@ -19,20 +70,95 @@ class WalletStats:
     avg_notional_7d: float
 
 
+@dataclass
+class WalletTally:
+    # Running per-wallet aggregates mirroring `Store.wallet_stats`, so a poll can fold in the
+    # trades it records without re-running the aggregation queries for every trade.
+    proxy_wallet: str
+    cutoff_ts: int
+    first_seen_ts: int | None = None
+    trades_total: int = 0
+    trades_7d: int = 0
+    notional_7d: float = 0.0
+    markets_total: set[str] = field(default_factory=set)
+    markets_7d: set[str] = field(default_factory=set)
+
+    def add(self, trade: Trade, notional: float) -> None:
+        ts = int(trade.timestamp)
+        if self.first_seen_ts is None or ts < self.first_seen_ts:
+            self.first_seen_ts = ts
+        self.trades_total += 1
+        self.markets_total.add(trade.condition_id)
+        if ts >= self.cutoff_ts:
+            self.trades_7d += 1
+            self.notional_7d += notional
+            self.markets_7d.add(trade.condition_id)
+
+    def stats(self) -> WalletStats:
+        return WalletStats(
+            proxy_wallet=self.proxy_wallet,
+            first_seen_ts=self.first_seen_ts,
+            trades_total=self.trades_total,
+            unique_markets_total=len(self.markets_total),
+            trades_7d=self.trades_7d,
+            unique_markets_7d=len(self.markets_7d),
+            avg_notional_7d=self.notional_7d / self.trades_7d if self.trades_7d else 0.0,
+        )
+
+
 class Store:
     def __init__(self, path: str) -> None:
-        self._conn = sqlite3.connect(path)
+        # Autocommit mode: single statements commit on their own, and `transaction()` issues an
+        # explicit BEGIN to group a batch under one commit.
+        self._conn = sqlite3.connect(path, isolation_level=None)
         self._conn.row_factory = sqlite3.Row
+        self._tx_depth = 0
+        # Parsed rows from `markets` (including misses), so repeat lookups skip SQLite and the
+        # JSON decode; `upsert_market` drops the entry it replaces.
+        self._market_cache: OrderedDict[str, Market | None] = OrderedDict()
+        # alert_key -> last_alert_ts, loaded on first use. The DB stays the source of truth:
+        # writes go to both, and a rollback drops the cache so it is reloaded.
+        self._alert_cache: dict[str, int] | None = None
         self._init_schema()
 
     def close(self) -> None:
         self._conn.close()
 
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        # Group writes into one commit (one WAL sync); nested uses join the outer transaction.
+        if self._tx_depth:
+            self._tx_depth += 1
+            try:
+                yield
+            finally:
+                self._tx_depth -= 1
+            return
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._tx_depth = 1
+        try:
+            yield
+        except BaseException:
+            self._conn.rollback()
+            # Both caches may hold rows written (or read back) inside the rolled-back transaction.
+            self._alert_cache = None
+            self._market_cache.clear()
+            raise
+        else:
+            self._conn.commit()
+        finally:
+            self._tx_depth = 0
+
     def _init_schema(self) -> None:
         cur = self._conn.cursor()
         cur.executescript(
             """
             PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA mmap_size=268435456;
+            PRAGMA cache_size=-65536;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA wal_autocheckpoint=1000;
             CREATE TABLE IF NOT EXISTS trades (
               trade_id TEXT PRIMARY KEY,
               ts INTEGER NOT NULL,
@@ -50,6 +176,10 @@ class Store:
             );
             CREATE INDEX IF NOT EXISTS idx_trades_wallet_ts ON trades(proxy_wallet, ts);
             CREATE INDEX IF NOT EXISTS idx_trades_market_ts ON trades(condition_id, ts);
+            -- Covers the grouped per-wallet tally scan (and wallet_stats' all-time aggregates)
+            -- without visiting the table rows.
+            CREATE INDEX IF NOT EXISTS idx_trades_wallet_market_cov
+              ON trades(proxy_wallet, condition_id, ts, notional);
 
             CREATE TABLE IF NOT EXISTS markets (
               condition_id TEXT PRIMARY KEY,
@@ -65,42 +195,60 @@ class Store:
             CREATE TABLE IF NOT EXISTS alerts (
               alert_key TEXT PRIMARY KEY,
               last_alert_ts INTEGER NOT NULL
-            );
+            ) WITHOUT ROWID;
             """
         )
-        self._conn.commit()
+        self._migrate_alerts_without_rowid()
+
+    def _migrate_alerts_without_rowid(self) -> None:
+        # Older DBs created `alerts` as a rowid table (row B-tree plus a separate PK index);
+        # rebuild it keyed directly by alert_key.
+        row = self._conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'alerts'"
+        ).fetchone()
+        if row is None or "WITHOUT ROWID" in str(row[0]).upper():
+            return
+        with self.transaction():
+            self._conn.execute(
+                """
+                CREATE TABLE alerts_new (
+                  alert_key TEXT PRIMARY KEY,
+                  last_alert_ts INTEGER NOT NULL
+                ) WITHOUT ROWID
+                """
+            )
+            self._conn.execute(
+                "INSERT INTO alerts_new(alert_key, last_alert_ts) "
+                "SELECT alert_key, last_alert_ts FROM alerts"
+            )
+            self._conn.execute("DROP TABLE alerts")
+            self._conn.execute("ALTER TABLE alerts_new RENAME TO alerts")
 
     def has_trade(self, trade_id: str) -> bool:
         cur = self._conn.execute("SELECT 1 FROM trades WHERE trade_id = ? LIMIT 1", (trade_id,))
         return cur.fetchone() is not None
 
+    def existing_trade_ids(self, trade_ids: list[str]) -> set[str]:
+        found: set[str] = set()
+        for i in range(0, len(trade_ids), _IN_CHUNK):
+            chunk = trade_ids[i : i + _IN_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            cur = self._conn.execute(
+                f"SELECT trade_id FROM trades WHERE trade_id IN ({placeholders})",  # nosec B608
+                chunk,
+            )
+            found.update(row[0] for row in cur)
+        return found
+
     def record_trade(self, trade: Trade, notional: float) -> None:
-        self._conn.execute(
-            """
-            INSERT OR IGNORE INTO trades(
-              trade_id, ts, proxy_wallet, condition_id, slug, title,
-              side, outcome, outcome_index, size, price, notional, transaction_hash
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                trade.trade_id,
-                trade.timestamp,
-                trade.proxy_wallet,
-                trade.condition_id,
-                trade.slug,
-                trade.title,
-                trade.side,
-                trade.outcome,
-                trade.outcome_index,
-                trade.size,
-                trade.price,
-                notional,
-                trade.transaction_hash,
-            ),
-        )
-        self._conn.commit()
+        self._conn.execute(_INSERT_TRADE_SQL, _trade_row(trade, notional))
+
+    def record_trades(self, trades: Iterable[tuple[Trade, float]]) -> None:
+        # One prepared statement (and one commit) for the whole batch.
+        with self.transaction():
+            self._conn.executemany(_INSERT_TRADE_SQL, (_trade_row(t, n) for t, n in trades))
 
-    def upsert_market(self, market: Market) -> None:
+    def upsert_market(self, market: Market, now_ts: int | None = None) -> None:
         self._conn.execute(
             """
             INSERT INTO markets(
@@ -124,36 +272,42 @@ class Store:
                 market.volume24hr,
                 json.dumps(market.outcomes),
                 json.dumps(market.outcome_prices),
-                int(time.time()),
+                int(time.time()) if now_ts is None else now_ts,
             ),
         )
-        self._conn.commit()
+        self._market_cache.pop(market.condition_id, None)
 
     def get_market(self, condition_id: str) -> Market | None:
-        cur = self._conn.execute(
-            "SELECT * FROM markets WHERE condition_id = ? LIMIT 1",
-            (condition_id,),
-        )
-        row = cur.fetchone()
-        if row is None:
-            return None
-        try:
-            outcomes = json.loads(row["outcomes_json"])
-            prices = json.loads(row["outcome_prices_json"])
-        except Exception:
-            outcomes = []
-            prices = []
-        return Market(
-            condition_id=row["condition_id"],
-            question=row["question"],
-            slug=row["slug"],
-            liquidity_num=row["liquidity_num"],
-            volume24hr=row["volume24hr"],
-            outcomes=[str(x) for x in outcomes] if isinstance(outcomes, list) else [],
-            outcome_prices=[float(x) for x in prices] if isinstance(prices, list) else [],
-        )
+        return self.get_markets_many([condition_id]).get(condition_id)
+
+    def get_markets_many(self, condition_ids: list[str]) -> dict[str, Market]:
+        cache = self._market_cache
+        out: dict[str, Market] = {}
+        todo: list[str] = []
+        for cid in dict.fromkeys(condition_ids):
+            if cid in cache:
+                cache.move_to_end(cid)
+                market = cache[cid]
+                if market is not None:
+                    out[cid] = market
+            else:
+                todo.append(cid)
+        for i in range(0, len(todo), _IN_CHUNK):
+            chunk = todo[i : i + _IN_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            cur = self._conn.execute(
+                f"SELECT * FROM markets WHERE condition_id IN ({placeholders})",  # nosec B608
+                chunk,
+            )
+            for row in cur:
+                out[row["condition_id"]] = _market_from_row(row)
+        for cid in todo:
+            cache[cid] = out.get(cid)
+        while len(cache) > _MARKET_CACHE_SIZE:
+            cache.popitem(last=False)
+        return out
 
-    def wallet_stats(self, proxy_wallet: str) -> WalletStats:
+    def wallet_stats(self, proxy_wallet: str, now_ts: int | None = None) -> WalletStats:
         cur = self._conn.execute(
             "SELECT MIN(ts) AS first_seen, COUNT(*) AS trades_total, "
             "COUNT(DISTINCT condition_id) AS unique_markets_total "
@@ -165,7 +319,7 @@ class Store:
         trades_total = int(row["trades_total"] or 0) if row else 0
         unique_markets_total = int(row["unique_markets_total"] or 0) if row else 0
 
-        cutoff = int(time.time()) - 7 * 24 * 60 * 60
+        cutoff = (int(time.time()) if now_ts is None else now_ts) - 7 * 24 * 60 * 60
         cur = self._conn.execute(
             "SELECT COUNT(*) AS trades_7d, COUNT(DISTINCT condition_id) AS unique_markets_7d, "
             "AVG(notional) AS avg_notional_7d "
@@ -187,20 +341,57 @@ class Store:
             avg_notional_7d=avg_notional_7d,
         )
 
-    def should_alert(self, alert_key: str, cooldown_s: int) -> bool:
-        now = int(time.time())
-        cur = self._conn.execute(
-            "SELECT last_alert_ts FROM alerts WHERE alert_key = ? LIMIT 1",
-            (alert_key,),
-        )
-        row = cur.fetchone()
-        if row is None:
+    def wallet_tallies(
+        self, proxy_wallets: list[str], now_ts: int | None = None
+    ) -> dict[str, WalletTally]:
+        cutoff = (int(time.time()) if now_ts is None else now_ts) - 7 * 24 * 60 * 60
+        wallets = list(dict.fromkeys(proxy_wallets))
+        tallies = {w: WalletTally(proxy_wallet=w, cutoff_ts=cutoff) for w in wallets}
+        # One grouped scan per IN-chunk yields everything `wallet_stats` derives from its two
+        # queries, for every wallet at once.
+        for i in range(0, len(wallets), _IN_CHUNK):
+            chunk = wallets[i : i + _IN_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            cur = self._conn.execute(
+                "SELECT proxy_wallet, condition_id, COUNT(*) AS n, MIN(ts) AS first_ts, "
+                "SUM(ts >= ?) AS n_7d, SUM(CASE WHEN ts >= ? THEN notional END) AS notional_7d "
+                f"FROM trades WHERE proxy_wallet IN ({placeholders}) "  # nosec B608
+                "GROUP BY proxy_wallet, condition_id",
+                (cutoff, cutoff, *chunk),
+            )
+            for row in cur:
+                tally = tallies[row["proxy_wallet"]]
+                first_ts = int(row["first_ts"])
+                if tally.first_seen_ts is None or first_ts < tally.first_seen_ts:
+                    tally.first_seen_ts = first_ts
+                tally.trades_total += int(row["n"])
+                tally.markets_total.add(row["condition_id"])
+                if row["n_7d"]:
+                    tally.trades_7d += int(row["n_7d"])
+                    tally.notional_7d += float(row["notional_7d"] or 0.0)
+                    tally.markets_7d.add(row["condition_id"])
+        return tallies
+
+    def wallet_stats_many(
+        self, proxy_wallets: list[str], now_ts: int | None = None
+    ) -> dict[str, WalletStats]:
+        tallies = self.wallet_tallies(proxy_wallets, now_ts=now_ts)
+        return {w: tally.stats() for w, tally in tallies.items()}
+
+    def _alerts(self) -> dict[str, int]:
+        if self._alert_cache is None:
+            cur = self._conn.execute("SELECT alert_key, last_alert_ts FROM alerts")
+            self._alert_cache = {row[0]: int(row[1]) for row in cur}
+        return self._alert_cache
+
+    def should_alert(self, alert_key: str, cooldown_s: int, now_ts: int | None = None) -> bool:
+        last = self._alerts().get(alert_key)
+        if last is None:
             return True
-        last = int(row["last_alert_ts"])
-        return (now - last) >= cooldown_s
+        return ((int(time.time()) if now_ts is None else now_ts) - last) >= cooldown_s
 
-    def mark_alerted(self, alert_key: str) -> None:
-        now = int(time.time())
+    def mark_alerted(self, alert_key: str, now_ts: int | None = None) -> None:
+        now = int(time.time()) if now_ts is None else now_ts
         self._conn.execute(
             """
             INSERT INTO alerts(alert_key, last_alert_ts) VALUES (?, ?)
@@ -208,4 +399,4 @@ class Store:
             """,
             (alert_key, now),
         )
-        self._conn.commit()
+        self._alerts()[alert_key] = now
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import replace
+from typing import Any
+
+from polymarket_watch.polymarket import Market, Trade
+
+
+class StubHttp:
+    # Serves canned Data API trades / Gamma markets payloads and records webhook posts.
+    def __init__(self, trades: Iterable[Any] = (), markets: Iterable[Any] = ()) -> None:
+        self._trades = list(trades)
+        self._markets = list(markets)
+        self.posts: list[dict[str, Any]] = []
+
+    def get_json(self, url: str, params=None):  # noqa: ANN001, ANN201
+        if url.endswith("/trades"):
+            return self._trades
+        if url.endswith("/markets"):
+            return self._markets
+        raise AssertionError("unexpected url")
+
+    def post_json(self, url: str, payload: dict[str, Any]) -> None:
+        self.posts.append({"url": url, "payload": payload})
+
+
+class StubClient:
+    # Stands in for PolymarketClient: one page of `trades`, and `market` re-keyed to whatever
+    # condition id is asked for (None for ids in `gone`).
+    def __init__(
+        self, trades: Iterable[Trade] = (), market: Market | None = None, gone: Iterable[str] = ()
+    ) -> None:
+        self._trades = list(trades)
+        self._market = market
+        self._gone = frozenset(gone)
+        self.market_calls: list[str] = []
+
+    def get_recent_trades(self, limit: int = 200, offset: int = 0) -> list[Trade]:
+        return self._trades if offset == 0 else []
+
+    def get_market_by_condition_id(self, condition_id: str) -> Market | None:
+        self.market_calls.append(condition_id)
+        if self._market is None or condition_id in self._gone:
+            return None
+        return replace(self._market, condition_id=condition_id)
+
+    def close(self) -> None:
+        return None
+
+
+class StubStore:
+    def __init__(self) -> None:
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager
+from dataclasses import replace
+from typing import Any
+
+import pytest
+
+from polymarket_watch.http import HttpClient, HttpConfig
+from polymarket_watch.polymarket import Market, Trade
+from polymarket_watch.store import Store, WalletStats
+
+# The value types are frozen dataclasses, so one base instance per type can be shared by the
+# whole session; tests derive variants with keyword overrides via `dataclasses.replace`.
+_BASE_TRADE = Trade(
+    trade_id="t1",
+    proxy_wallet="0xabc",
+    side="BUY",
+    asset="1",
+    condition_id="0xcond",
+    size=100.0,
+    price=0.5,
+    timestamp=1_700_000_000,
+    title="Test market",
+    slug="test-market",
+    event_slug="test-event",
+    outcome="Yes",
+    outcome_index=0,
+    transaction_hash="0xtx",
+    name=None,
+    pseudonym=None,
+)
+
+_BASE_MARKET = Market(
+    condition_id="0xcond",
+    question="Q?",
+    slug="test-market",
+    liquidity_num=10_000.0,
+    volume24hr=5_000.0,
+    outcomes=["Yes", "No"],
+    outcome_prices=[0.5, 0.5],
+)
+
+_BASE_WALLET_STATS = WalletStats(
+    proxy_wallet="0xabc",
+    first_seen_ts=None,
+    trades_total=1,
+    unique_markets_total=1,
+    trades_7d=1,
+    unique_markets_7d=1,
+    avg_notional_7d=0.0,
+)
+
+
+def _factory(base: Any) -> Callable[..., Any]:
+    def make(**overrides: Any) -> Any:
+        return replace(base, **overrides) if overrides else base
+
+    return make
+
+
+@pytest.fixture(scope="session")
+def make_trade() -> Callable[..., Trade]:
+    return _factory(_BASE_TRADE)
+
+
+@pytest.fixture(scope="session")
+def make_market() -> Callable[..., Market]:
+    return _factory(_BASE_MARKET)
+
+
+@pytest.fixture(scope="session")
+def make_wallet_stats() -> Callable[..., WalletStats]:
+    return _factory(_BASE_WALLET_STATS)
+
+
+def _test_store() -> Store:
+    # Durability is irrelevant here: keep the database, its journal and temp tables in RAM.
+    store = Store(":memory:")
+    store._conn.executescript(
+        """
+        PRAGMA journal_mode=MEMORY;
+        PRAGMA synchronous=OFF;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA locking_mode=EXCLUSIVE;
+        """
+    )
+    return store
+
+
+@pytest.fixture(scope="session")
+def shared_store() -> Iterator[Store]:
+    store = _test_store()
+    yield store
+    store.close()
+
+
+@contextmanager
+def _rolled_back(store: Store) -> Iterator[Store]:
+    # Run the block inside a savepoint on `store` and roll it back afterwards. Holding
+    # `_tx_depth` at 1 makes the store's own `transaction()` blocks join the savepoint instead of
+    # issuing BEGIN; the in-memory caches are dropped so they cannot outlive the rolled-back rows.
+    conn = store._conn
+    conn.execute("SAVEPOINT t")
+    store._tx_depth = 1
+    try:
+        yield store
+    finally:
+        store._tx_depth = 0
+        conn.execute("ROLLBACK TO t")
+        conn.execute("RELEASE t")
+        store._market_cache.clear()
+        store._alert_cache = None
+
+
+@pytest.fixture(scope="session")
+def store_rollback() -> Callable[[Store], AbstractContextManager[Store]]:
+    # The savepoint wrapper behind `store`, for tests that need more than one isolated round.
+    return _rolled_back
+
+
+@pytest.fixture
+def store(shared_store: Store) -> Iterator[Store]:
+    with _rolled_back(shared_store) as s:
+        yield s
+
+
+@pytest.fixture(scope="module")
+def module_monkeypatch() -> Iterator[pytest.MonkeyPatch]:
+    # For patches that are the same for every test in a module: applied once, undone at teardown.
+    mp = pytest.MonkeyPatch()
+    yield mp
+    mp.undo()
+
+
+@pytest.fixture(scope="session")
+def http_client() -> Iterator[HttpClient]:
+    # Shared across the session, so drop the rate-limit spacing that would otherwise separate
+    # requests made by consecutive tests.
+    client = HttpClient(HttpConfig(min_interval_s=0.0))
+    yield client
+    client.close()
+
+
+@pytest.fixture(scope="session")
+def http_client_fast_retry() -> Iterator[HttpClient]:
+    client = HttpClient(HttpConfig(min_interval_s=0.0, max_retries=1))
+    yield client
+    client.close()
+
+
+class _FakeResp:
+    # Just the response surface HttpClient uses: a context manager whose read() returns the body.
+    __slots__ = ("_body",)
+
+    def __init__(self, body: bytes) -> None:
+        self._body = body
+
+    def __enter__(self) -> "_FakeResp":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+    def read(self, *args, **kwargs) -> bytes:  # noqa: ANN002, ANN003
+        return self._body
+
+
+@pytest.fixture
+def fake_urlopen(monkeypatch):  # noqa: ANN001, ANN201
+    # Swap HttpClient's transport seam for `fn(req, timeout)`, which returns the response body
+    # (or raises); returns the list of requests seen.
+    def install(fn: Callable[..., bytes]) -> list[Any]:
+        calls: list[Any] = []
+
+        def _urlopen(self, req, timeout):  # noqa: ANN001, ANN202
+            calls.append(req)
+            return _FakeResp(fn(req, timeout))
+
+        monkeypatch.setattr(HttpClient, "_urlopen", _urlopen)
+        return calls
+
+    return install
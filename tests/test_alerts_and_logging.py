@@ -2,8 +2,15 @@ from __future__ import annotations
 
 import json
 import logging
+from dataclasses import asdict
 
-from polymarket_watch.alerts import render_json, render_text
+from polymarket_watch.alerts import (
+    market_to_dict,
+    render_json,
+    render_text,
+    trade_to_dict,
+    wallet_stats_to_dict,
+)
 from polymarket_watch.logging_json import JsonFormatter
 from polymarket_watch.polymarket import Market, Trade
 from polymarket_watch.scoring import Alert
@@ -70,6 +77,15 @@ def test_render_text_and_json() -> None:
     assert payload["trade"]["slug"] == "test-market"
 
 
+def test_dataclass_dicts_match_asdict() -> None:
+    alert = _sample_alert()
+    assert trade_to_dict(alert.trade) == asdict(alert.trade)
+    assert wallet_stats_to_dict(alert.wallet_stats) == asdict(alert.wallet_stats)
+    market = market_to_dict(alert.market)
+    assert market == asdict(alert.market)
+    assert market["outcomes"] is not alert.market.outcomes
+
+
 def test_json_formatter_includes_fields() -> None:
     formatter = JsonFormatter()
     record = logging.LogRecord(
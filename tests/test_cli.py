@@ -2,49 +2,37 @@ from __future__ import annotations
 
 import json
 
-from polymarket_watch.polymarket import Market, Trade
-
-
-class _StubClient:
-    def get_recent_trades(self, limit: int = 200, offset: int = 0):  # noqa: ANN201
-        return [
-            Trade(
-                trade_id="t1",
-                proxy_wallet="0xabc",
-                side="BUY",
-                asset="1",
-                condition_id="0xcond",
-                size=10_000,
-                price=0.2,
-                timestamp=1_700_000_000,
-                title="Test market",
-                slug="test-market",
-                event_slug="test-event",
-                outcome="Yes",
-                outcome_index=0,
-                transaction_hash="0xtx",
-                name=None,
-                pseudonym=None,
-            )
-        ]
+import pytest
+from _stubs import StubClient, StubStore
+
+import polymarket_watch.cli as cli
+
+
+@pytest.fixture(scope="module")
+def quiet_cli(module_monkeypatch):  # noqa: ANN001, ANN201
+    # No CLI test here may really sleep; patched once for the whole module.
+    module_monkeypatch.setattr(cli.time, "sleep", lambda _s: None)
+    return cli
 
-    def get_market_by_condition_id(self, condition_id: str):  # noqa: ANN201
-        return Market(
-            condition_id=condition_id,
-            question="Test market?",
-            slug="test-market",
-            liquidity_num=10_000.0,
-            volume24hr=5_000.0,
-            outcomes=["Yes", "No"],
-            outcome_prices=[0.2, 0.8],
-        )
+
+@pytest.fixture
+def stub_client(make_trade, make_market) -> StubClient:  # noqa: ANN001
+    # Function-scoped: StubClient records its market lookups, so each test gets a fresh one.
+    return StubClient(
+        [make_trade(size=10_000, price=0.2)],
+        make_market(question="Test market?", outcome_prices=[0.2, 0.8]),
+    )
 
 
-def test_cli_once_emits_alert_json(monkeypatch, capsys) -> None:  # noqa: ANN001
-    import polymarket_watch.cli as cli
+@pytest.fixture
+def stub_cli(quiet_cli, stub_client, monkeypatch):  # noqa: ANN001, ANN201
+    # Every `PolymarketClient()` the CLI builds during the test is this test's stub.
+    monkeypatch.setattr(quiet_cli, "PolymarketClient", lambda: stub_client)
+    return quiet_cli
 
-    monkeypatch.setattr(cli, "PolymarketClient", lambda: _StubClient())
-    code = cli.main(
+
+def test_cli_once_emits_alert_json(stub_cli, capsys) -> None:  # noqa: ANN001
+    code = stub_cli.main(
         [
             "once",
             "--db",
@@ -69,24 +57,25 @@ def test_cli_once_emits_alert_json(monkeypatch, capsys) -> None:  # noqa: ANN001
     assert payload["trade"]["slug"] == "test-market"
 
 
-def test_cli_watch_recovers_from_iteration_error(monkeypatch) -> None:  # noqa: ANN001
-    import polymarket_watch.cli as cli
+def test_cli_watch_recovers_from_iteration_error(monkeypatch, stub_cli) -> None:  # noqa: ANN001
+    store = StubStore()
+    monkeypatch.setattr(stub_cli, "Store", lambda _db: store)
 
-    class _StubStore:
-        def __init__(self) -> None:
+    class _StubAlerter:
+        def __init__(self, url: str) -> None:
             self.closed = False
 
         def close(self) -> None:
             self.closed = True
 
-    store = _StubStore()
-    monkeypatch.setattr(cli, "Store", lambda _db: store)
-    monkeypatch.setattr(cli, "PolymarketClient", lambda: object())
+    monkeypatch.setattr(stub_cli, "DiscordAlerter", _StubAlerter)
 
     calls = {"n": 0}
     events: list[str] = []
+    alerters: list[object] = []
 
-    def _fake_run_once(**_kwargs) -> int:
+    def _fake_run_once(**kwargs) -> int:  # noqa: ANN003
+        alerters.append(kwargs["alerter"])
         calls["n"] += 1
         if calls["n"] == 1:
             raise RuntimeError("boom")
@@ -95,12 +84,34 @@ def test_cli_watch_recovers_from_iteration_error(monkeypatch) -> None:  # noqa:
     def _fake_log(_logger, _level, message: str, **_fields) -> None:
         events.append(message)
 
-    monkeypatch.setattr(cli, "_run_once", _fake_run_once)
-    monkeypatch.setattr(cli, "log", _fake_log)
-    monkeypatch.setattr(cli.time, "sleep", lambda _s: None)
+    monkeypatch.setattr(stub_cli, "_run_once", _fake_run_once)
+    monkeypatch.setattr(stub_cli, "log", _fake_log)
 
-    code = cli.main(["watch", "--db", ":memory:", "--poll-seconds", "0", "--log-level", "CRITICAL"])
+    code = stub_cli.main(
+        [
+            "watch",
+            "--db",
+            ":memory:",
+            "--poll-seconds",
+            "0",
+            "--log-level",
+            "CRITICAL",
+            "--discord-webhook-url",
+            "https://example.com/hook",
+        ]
+    )
     assert code == 0
     assert calls["n"] == 2
+    # One alerter (and webhook connection pool) serves every poll and is closed on shutdown.
+    assert alerters[0] is alerters[1]
+    assert alerters[0].closed is True
     assert "watch_iteration_failed" in events
     assert store.closed is True
+
+
+def test_prefetch_markets_fetches_each_missing_market_once(store, make_market) -> None:  # noqa: ANN001
+    client = StubClient(market=make_market(), gone=["0xgone"])
+    cli._prefetch_markets(store, client, ["0xa", "0xb", "0xgone"])
+    assert sorted(client.market_calls) == ["0xa", "0xb", "0xgone"]
+    assert store.get_market("0xa") is not None
+    assert store.get_market("0xgone") is None
@@ -1,103 +1,45 @@
 from __future__ import annotations
 
-import io
 import json
 import urllib.error
-from unittest.mock import patch
+
+from _stubs import StubHttp
 
 from polymarket_watch.alerts import DiscordAlerter
-from polymarket_watch.http import HttpClient, HttpConfig
-from polymarket_watch.polymarket import Market, Trade
-from polymarket_watch.scoring import build_alert
-from polymarket_watch.store import Store, WalletStats
-
-
-class _FakeResp(io.BytesIO):
-    def __enter__(self) -> "_FakeResp":
-        return self
-
-    def __exit__(self, exc_type, exc, tb) -> None:  # noqa: ANN001
-        return None
-
-
-def _sample_trade(ts: int = 1_700_000_000) -> Trade:
-    return Trade(
-        trade_id="t1",
-        proxy_wallet="0xabc",
-        side="BUY",
-        asset="1",
-        condition_id="0xcond",
-        size=100.0,
-        price=0.5,
-        timestamp=ts,
-        title="Test market",
-        slug="test-market",
-        event_slug="test-event",
-        outcome="Yes",
-        outcome_index=0,
-        transaction_hash="0xtx",
-        name=None,
-        pseudonym=None,
-    )
+from polymarket_watch.scoring import build_alert, score_trade
 
 
-def test_discord_alerter_calls_webhook() -> None:
-    calls: list[dict[str, object]] = []
+_OK_BODY = json.dumps({"ok": True}).encode("utf-8")
 
-    class _StubHttp:
-        def post_json(self, url: str, payload: dict[str, object]) -> None:
-            calls.append({"url": url, "payload": payload})
 
+def test_discord_alerter_calls_webhook(make_trade, make_wallet_stats, make_market) -> None:  # noqa: ANN001
     alert = build_alert(
-        trade=_sample_trade(),
-        wallet_stats=WalletStats(
-            proxy_wallet="0xabc",
-            first_seen_ts=None,
-            trades_total=1,
-            unique_markets_total=1,
-            trades_7d=1,
-            unique_markets_7d=1,
-            avg_notional_7d=0.0,
-        ),
-        market=Market(
-            condition_id="0xcond",
-            question="Q?",
-            slug="test-market",
-            liquidity_num=10_000.0,
-            volume24hr=5_000.0,
-            outcomes=["Yes", "No"],
-            outcome_prices=[0.5, 0.5],
-        ),
+        trade=make_trade(),
+        wallet_stats=make_wallet_stats(),
+        market=make_market(),
         min_notional=1.0,
         min_score=1,
     )
     assert alert is not None
 
-    alerter = DiscordAlerter("https://example.com/webhook", http=_StubHttp())  # type: ignore[arg-type]
+    http = StubHttp()
+    alerter = DiscordAlerter("https://example.com/webhook", http=http)  # type: ignore[arg-type]
     alerter.send(alert)
-    assert calls and calls[0]["url"] == "https://example.com/webhook"
-
+    assert http.posts and http.posts[0]["url"] == "https://example.com/webhook"
 
-def test_store_alert_cooldown_roundtrip(tmp_path) -> None:  # noqa: ANN001
-    store = Store(str(tmp_path / "x.db"))
-    try:
-        key = "0xabc:0xcond"
-        assert store.should_alert(key, cooldown_s=3600) is True
-        store.mark_alerted(key)
-        assert store.should_alert(key, cooldown_s=3600) is False
-    finally:
-        store.close()
 
+def test_store_alert_cooldown_roundtrip(store) -> None:  # noqa: ANN001
+    key = "0xabc:0xcond"
+    assert store.should_alert(key, cooldown_s=3600) is True
+    store.mark_alerted(key)
+    assert store.should_alert(key, cooldown_s=3600) is False
 
-def test_httpclient_retries_on_429_then_succeeds() -> None:
-    client = HttpClient(HttpConfig(min_interval_s=0.0, max_retries=1))
-
-    body = json.dumps({"ok": True}).encode("utf-8")
-    calls = {"n": 0}
 
+def test_httpclient_retries_on_429_then_succeeds(
+    monkeypatch, fake_urlopen, http_client_fast_retry
+) -> None:  # noqa: ANN001
     def _fake_urlopen(req, timeout):  # noqa: ANN001, ANN201
-        calls["n"] += 1
-        if calls["n"] == 1:
+        if len(calls) == 1:
             raise urllib.error.HTTPError(
                 req.full_url,
                 429,
@@ -105,28 +47,34 @@ def test_httpclient_retries_on_429_then_succeeds() -> None:
                 hdrs={"Retry-After": "0"},
                 fp=None,
             )
-        return _FakeResp(body)
+        return _OK_BODY
 
-    with patch("polymarket_watch.http.time.sleep", return_value=None):
-        with patch("urllib.request.urlopen", side_effect=_fake_urlopen):
-            assert client.get_json("https://example.com/api") == {"ok": True}
+    monkeypatch.setattr("polymarket_watch.http.time.sleep", lambda _s: None)
+    calls = fake_urlopen(_fake_urlopen)
+    assert http_client_fast_retry.get_json("https://example.com/api") == {"ok": True}
+    assert len(calls) == 2
 
 
-def test_scoring_returns_none_below_threshold() -> None:
-    trade = _sample_trade()
+def test_scoring_returns_none_below_threshold(make_trade, make_wallet_stats) -> None:  # noqa: ANN001
     alert = build_alert(
-        trade=trade,
-        wallet_stats=WalletStats(
-            proxy_wallet="0xabc",
-            first_seen_ts=None,
-            trades_total=10,
-            unique_markets_total=4,
-            trades_7d=3,
-            unique_markets_7d=3,
-            avg_notional_7d=0.0,
+        trade=make_trade(),
+        wallet_stats=make_wallet_stats(
+            trades_total=10, unique_markets_total=4, trades_7d=3, unique_markets_7d=3
         ),
         market=None,
         min_notional=10_000.0,
         min_score=10,
     )
     assert alert is None
+
+
+def test_scoring_recent_trade_uses_supplied_clock(make_trade, make_wallet_stats) -> None:  # noqa: ANN001
+    trade = make_trade()
+    stats = make_wallet_stats(
+        trades_total=10, unique_markets_total=5, trades_7d=0, unique_markets_7d=0
+    )
+    kwargs = {"trade": trade, "notional": 1.0, "wallet_stats": stats, "market": None}
+    _, reasons = score_trade(**kwargs, min_notional=1e9, now_ts=trade.timestamp + 30)
+    assert "recent_trade" in reasons
+    _, reasons = score_trade(**kwargs, min_notional=1e9, now_ts=trade.timestamp + 3600)
+    assert "recent_trade" not in reasons
@@ -4,10 +4,14 @@ import importlib.util
 import json
 from pathlib import Path
 
-from polymarket_watch.polymarket import Market, Trade
+import pytest
+from _stubs import StubClient
 
 
-def _load_publish_module():  # noqa: ANN202
+@pytest.fixture(scope="session")
+def publish_module():  # noqa: ANN201
+    # Load the script once per session; tests patch its globals through `monkeypatch`, which
+    # restores them afterwards.
     script = Path(__file__).resolve().parents[1] / "scripts" / "publish_alerts.py"
     spec = importlib.util.spec_from_file_location("publish_alerts_test_module", script)
     assert spec is not None
@@ -17,41 +21,7 @@ def _load_publish_module():  # noqa: ANN202
     return module
 
 
-def _trade(*, trade_id: str, ts: int, wallet: str = "0xabc") -> Trade:
-    return Trade(
-        trade_id=trade_id,
-        proxy_wallet=wallet,
-        side="BUY",
-        asset="1",
-        condition_id="0xcond",
-        size=2000.0,
-        price=0.5,
-        timestamp=ts,
-        title="Test market",
-        slug="test-market",
-        event_slug="test-event",
-        outcome="Yes",
-        outcome_index=0,
-        transaction_hash=f"0x{trade_id}",
-        name=None,
-        pseudonym=None,
-    )
-
-
-def _market(condition_id: str) -> Market:
-    return Market(
-        condition_id=condition_id,
-        question="Q?",
-        slug="test-market",
-        liquidity_num=10_000.0,
-        volume24hr=5_000.0,
-        outcomes=["Yes", "No"],
-        outcome_prices=[0.5, 0.5],
-    )
-
-
-def test_wallet_stats_uses_persisted_trade_total() -> None:
-    mod = _load_publish_module()
+def test_wallet_stats_uses_persisted_trade_total(publish_module) -> None:  # noqa: ANN001
     state = {
         "wallets": {
             "0xabc": {
@@ -62,46 +32,63 @@ def test_wallet_stats_uses_persisted_trade_total() -> None:
             }
         }
     }
-    stats = mod._wallet_stats_from_state(state, "0xabc", min_notional=1000.0)
+    stats = publish_module._wallet_stats_from_state(state, "0xabc", min_notional=1000.0)
     assert stats.first_seen_ts == 111
     assert stats.trades_total == 12
 
 
-def test_main_skips_checkpointed_boundary_trade(tmp_path, monkeypatch) -> None:  # noqa: ANN001
-    mod = _load_publish_module()
-    boundary_ts = 100
+def test_record_wallet_event_migrates_legacy_rows_to_columns(publish_module, make_trade) -> None:  # noqa: ANN001
+    now = 1_000_000
+    state = {
+        "wallets": {
+            "0xabc": {
+                "first_seen_ts": 100,
+                "trades_total": 2,
+                "events": [[now - 8 * 86_400, "0xold", 3000.0], [now - 60, "0xcond", 2500.0]],
+                "markets": ["0xold", "0xcond"],
+            }
+        }
+    }
+    publish_module._record_wallet_event(
+        state, make_trade(timestamp=now, size=2000.0), 1000.0, now_ts=now
+    )
+    w = state["wallets"]["0xabc"]
+    assert "events" not in w
+    assert w["ev_ts"] == [now - 60, now]
+    assert w["ev_cond"] == ["0xcond", "0xcond"]
+    assert w["ev_not"] == [2500.0, 1000.0]
+    assert w["trades_total"] == 3
 
-    class _StubClient:
-        def get_recent_trades(self, limit: int = 200, offset: int = 0):  # noqa: ANN001, ANN201
-            if offset > 0:
-                return []
-            return [
-                _trade(trade_id="a_dup", ts=boundary_ts),
-                _trade(trade_id="z_new", ts=boundary_ts),
-            ]
 
-        def get_market_by_condition_id(self, condition_id: str):  # noqa: ANN001, ANN201
-            return _market(condition_id)
+def test_main_skips_checkpointed_boundary_trade(
+    publish_module, tmp_path, monkeypatch, make_trade, make_market
+) -> None:  # noqa: ANN001
+    boundary_ts = 100
+
+    trades = [
+        make_trade(trade_id=tid, timestamp=boundary_ts, size=2000.0, transaction_hash=f"0x{tid}")
+        for tid in ("a_dup", "z_new")
+    ]
+    client = StubClient(trades, make_market())
 
     state_path = tmp_path / "state.json"
     out_path = tmp_path / "alerts.json"
     out_jsonl_path = tmp_path / "alerts.jsonl"
     archive_dir = tmp_path / "archive"
 
-    state_path.write_text(
+    state_path.write_bytes(
         json.dumps(
             {
                 "last_fetched_trade_ts": boundary_ts,
                 "last_fetched_trade_ids": ["a_dup"],
                 "seen_trade_ids": [],
             }
-        ),
-        encoding="utf-8",
+        ).encode("utf-8")
     )
-    out_path.write_text(json.dumps({"alerts": []}), encoding="utf-8")
+    out_path.write_bytes(json.dumps({"alerts": []}).encode("utf-8"))
 
-    monkeypatch.setattr(mod, "PolymarketClient", lambda: _StubClient())
-    rc = mod.main(
+    monkeypatch.setattr(publish_module, "PolymarketClient", lambda: client)
+    rc = publish_module.main(
         [
             "--state",
             str(state_path),
@@ -123,53 +110,49 @@ def test_main_skips_checkpointed_boundary_trade(tmp_path, monkeypatch) -> None:
     )
     assert rc == 0
 
-    state = json.loads(state_path.read_text(encoding="utf-8"))
+    state = publish_module._load_state(state_path)
     assert "z_new" in state["seen_trade_ids"]
     assert "a_dup" not in state["seen_trade_ids"]
     assert set(state["last_fetched_trade_ids"]) == {"a_dup", "z_new"}
 
-    payload = json.loads(out_path.read_text(encoding="utf-8"))
+    payload = json.loads(out_path.read_bytes())
     assert len(payload["alerts"]) == 1
     assert payload["alerts"][0]["trade"]["trade_id"] == "z_new"
 
 
-def test_main_dedupes_existing_alert_feed(tmp_path, monkeypatch) -> None:  # noqa: ANN001
-    mod = _load_publish_module()
-
-    class _StubClient:
-        def get_recent_trades(self, limit: int = 200, offset: int = 0):  # noqa: ANN001, ANN201
-            return []
-
-        def get_market_by_condition_id(self, condition_id: str):  # noqa: ANN001, ANN201
-            return _market(condition_id)
-
-    alert = {
-        "type": "alert",
-        "score": 8,
-        "reasons": ["market_heat_24h"],
-        "notional": 5000.0,
-        "url": "https://polymarket.com/market/test-market",
-        "trade": {
-            "trade_id": "dup-trade",
-            "condition_id": "0xcond",
-            "timestamp": 123,
-            "proxy_wallet": "0xabc",
-        },
-        "wallet_stats": {"proxy_wallet": "0xabc"},
-        "market": None,
-        "metrics": {"event_type": "fast_move"},
-    }
+_DUP_ALERT = {
+    "type": "alert",
+    "score": 8,
+    "reasons": ["market_heat_24h"],
+    "notional": 5000.0,
+    "url": "https://polymarket.com/market/test-market",
+    "trade": {
+        "trade_id": "dup-trade",
+        "condition_id": "0xcond",
+        "timestamp": 123,
+        "proxy_wallet": "0xabc",
+    },
+    "wallet_stats": {"proxy_wallet": "0xabc"},
+    "market": None,
+    "metrics": {"event_type": "fast_move"},
+}
+
+
+def test_main_dedupes_existing_alert_feed(
+    publish_module, tmp_path, monkeypatch, make_market
+) -> None:  # noqa: ANN001
+    client = StubClient(market=make_market())
 
     state_path = tmp_path / "state.json"
     out_path = tmp_path / "alerts.json"
     out_jsonl_path = tmp_path / "alerts.jsonl"
     archive_dir = tmp_path / "archive"
 
-    state_path.write_text(json.dumps({}), encoding="utf-8")
-    out_path.write_text(json.dumps({"alerts": [alert, alert]}), encoding="utf-8")
+    state_path.write_bytes(json.dumps({}).encode("utf-8"))
+    out_path.write_bytes(json.dumps({"alerts": [_DUP_ALERT, _DUP_ALERT]}).encode("utf-8"))
 
-    monkeypatch.setattr(mod, "PolymarketClient", lambda: _StubClient())
-    rc = mod.main(
+    monkeypatch.setattr(publish_module, "PolymarketClient", lambda: client)
+    rc = publish_module.main(
         [
             "--state",
             str(state_path),
@@ -187,5 +170,100 @@ def test_main_dedupes_existing_alert_feed(tmp_path, monkeypatch) -> None:  # noq
     )
     assert rc == 0
 
-    payload = json.loads(out_path.read_text(encoding="utf-8"))
+    payload = json.loads(out_path.read_bytes())
     assert len(payload["alerts"]) == 1
+
+
+def test_window_stats_multi_slices_each_window(publish_module) -> None:  # noqa: ANN001
+    events = [
+        [300, "0xb", 0.6, 2500.0, 0, "BUY"],
+        [100, "0xa", 0.4, 1000.0, 0, "BUY"],
+        [200, "0xa", 0.5, 2000.0, 1, "SELL"],
+        ["bad"],
+    ]
+    wide, narrow = publish_module._window_stats_multi(events, since_ts_list=[100, 250])
+    assert wide["notional_sum"] == 5500.0
+    assert wide["unique_wallets"] == 2
+    assert wide["top_wallet"] == "0xa"
+    assert wide["top_net_wallet"] == "0xa"
+    assert narrow["notional_sum"] == 2500.0
+    assert narrow["unique_wallets"] == 1
+    assert narrow["price_range"] is None
+
+
+def test_window_stats_multi_outcome_market_has_no_canonical_range(publish_module) -> None:  # noqa: ANN001
+    events = [
+        [100, "0xa", 0.2, 1000.0, 0, "BUY"],
+        [110, "0xa", 0.9, 1000.0, 2, "BUY"],
+    ]
+    (stats,) = publish_module._window_stats_multi(events, since_ts_list=[0])
+    assert stats["price_range"] is None
+    assert stats["price_range_raw"] == 0.9 - 0.2
+    assert stats["top_net_wallet"] is None
+    assert stats["top_wallet_trades"] == 2
+
+
+def test_score_ceiling_bounds_cold_markets(publish_module) -> None:  # noqa: ANN001
+    assert publish_module._score_ceiling([]) == (0, False)
+    assert publish_module._score_ceiling([[100, "0xa", 0.5, 60_000.0, 1, "BUY"]]) == (4, False)
+    events = [[100 + i, f"0x{i}", 0.5, 3_000.0, 1, "BUY"] for i in range(5)]
+    assert publish_module._score_ceiling(events) == (6 + 1, True)
+    events.append([200, "0xa", 0.6, 30_000.0, 1, "BUY"])
+    assert publish_module._score_ceiling(events) == (6 + 2 + 1 + 7, True)
+
+
+def test_state_log_replays_deltas_and_compacts(publish_module, tmp_path) -> None:  # noqa: ANN001
+    state_path = tmp_path / "state.json"
+    log_path = publish_module._state_log_path(state_path)
+    state = {
+        "alerts": {"old": 1, "keep": 2},
+        "seen_trade_ids": ["a"],
+        "wallets": {"0xabc": {"trades_total": 1}},
+    }
+    state_path.write_bytes(json.dumps(state).encode("utf-8"))
+
+    keys_before = publish_module._state_key_snapshot(state)
+    touched = {name: set() for name in publish_module._STATE_SUBTREES}
+    state["alerts"].pop("old")
+    state["wallets"]["0xabc"]["trades_total"] = 2
+    touched["wallets"].add("0xabc")
+    state["markets"] = {"0xcond": {"condition_id": "0xcond"}}
+    state["seen_trade_ids"].append("b")
+    state["updated_at"] = 123
+    delta = publish_module._state_delta(
+        state, keys_before=keys_before, touched=touched, seen_added=["b"], seen_max=2
+    )
+
+    publish_module._save_state(state, state_path, delta=delta, max_log_bytes=1_000_000)
+    assert log_path.exists()
+    assert json.loads(state_path.read_bytes())["seen_trade_ids"] == ["a"]
+    assert publish_module._load_state(state_path) == state
+
+    publish_module._save_state(state, state_path, delta=delta, max_log_bytes=1)
+    assert not log_path.exists()
+    assert json.loads(state_path.read_bytes()) == state
+
+
+def test_sync_text_skips_appends_or_rewrites(publish_module, tmp_path) -> None:  # noqa: ANN001
+    path = tmp_path / "alerts.jsonl"
+    publish_module._sync_text(path, "a\n")
+    assert path.read_text(encoding="utf-8") == "a\n"
+
+    inode = path.stat().st_ino
+    publish_module._sync_text(path, "a\nb\n")
+    assert path.read_text(encoding="utf-8") == "a\nb\n"
+    assert path.stat().st_ino == inode
+
+    publish_module._sync_text(path, "b\nc\n")
+    assert path.read_text(encoding="utf-8") == "b\nc\n"
+
+
+def test_render_feed_is_the_payload_as_json(publish_module) -> None:  # noqa: ANN001
+    alerts = [{"score": 9, "trade": {"trade_id": "b"}}, {"score": 8, "trade": {"trade_id": "a"}}]
+    meta = {"generated_at": 123, "new_alerts": 1, "repo": "o/r"}
+    text = publish_module._render_feed(
+        meta, [publish_module._JSON_SORTED.encode(a) for a in alerts]
+    )
+    assert json.loads(text) == {"alerts": alerts, **meta}
+    assert text.endswith("}\n")
+    assert json.loads(publish_module._render_feed(meta, [])) == {"alerts": [], **meta}
@@ -1,40 +1,117 @@
 from __future__ import annotations
 
-import os
-import tempfile
+import sqlite3
+import time
+from dataclasses import replace
 
-from polymarket_watch.polymarket import Trade
 from polymarket_watch.store import Store
 
 
-def test_store_records_and_stats() -> None:
-    with tempfile.TemporaryDirectory() as td:
-        db = os.path.join(td, "t.db")
-        store = Store(db)
+def test_store_records_and_stats(store, make_trade) -> None:  # noqa: ANN001
+    trade = make_trade()
+    assert store.has_trade("t1") is False
+    store.record_trade(trade, notional=50.0)
+    assert store.has_trade("t1") is True
+    ids = ["t1"] + [f"missing{i}" for i in range(1000)]
+    assert store.existing_trade_ids(ids) == {"t1"}
+    stats = store.wallet_stats("0xabc")
+    assert stats.trades_total == 1
+    assert stats.unique_markets_total == 1
+    store.record_trades([(trade, 50.0), (replace(trade, trade_id="t2"), 75.0)])
+    assert store.existing_trade_ids(["t1", "t2", "t3"]) == {"t1", "t2"}
+
+
+def test_store_rollback_isolates_rounds(shared_store, store_rollback, make_trade) -> None:  # noqa: ANN001
+    with store_rollback(shared_store) as store:
+        store.record_trades([(make_trade(), 50.0)])
+        store.mark_alerted("k")
+        assert store.existing_trade_ids(["t1"]) == {"t1"}
+    with store_rollback(shared_store) as store:
+        assert store.existing_trade_ids(["t1"]) == set()
+        assert store.wallet_stats("0xabc").trades_total == 0
+        assert store.should_alert("k", cooldown_s=3600) is True
+    assert shared_store._tx_depth == 0
+    assert not shared_store._conn.in_transaction
+
+
+def test_wallet_tally_tracks_wallet_stats_across_inserts(store, make_trade) -> None:  # noqa: ANN001
+    now = int(time.time())
+    base = make_trade(trade_id="t0", condition_id="0xold", timestamp=now - 30 * 86_400)
+    store.record_trade(base, notional=50.0)
+    tally = store.wallet_tallies(["0xabc"])["0xabc"]
+    assert tally.stats() == store.wallet_stats("0xabc")
+
+    for i, cond in enumerate(["0xa", "0xa", "0xb", "0xold"], start=1):
+        trade = replace(base, trade_id=f"t{i}", condition_id=cond, timestamp=now - i)
+        store.record_trade(trade, notional=100.0 * i)
+        tally.add(trade, 100.0 * i)
+        assert tally.stats() == store.wallet_stats("0xabc")
+
+    many = store.wallet_stats_many(["0xabc", "0xnobody"])
+    assert many["0xabc"] == store.wallet_stats("0xabc")
+    assert many["0xnobody"] == store.wallet_stats("0xnobody")
+
+
+def test_transaction_groups_writes_and_rolls_back(tmp_path, make_market) -> None:  # noqa: ANN001
+    db = str(tmp_path / "t.db")
+    store = Store(db)
+    market = make_market()
+    try:
+        with store.transaction():
+            store.mark_alerted("k1")
+            store.upsert_market(market)
+            with store.transaction():
+                store.mark_alerted("k2")
         try:
-            trade = Trade(
-                trade_id="t1",
-                proxy_wallet="0xabc",
-                side="BUY",
-                asset="1",
-                condition_id="0xcond",
-                size=100,
-                price=0.5,
-                timestamp=1_700_000_000,
-                title="Test market",
-                slug="test-market",
-                event_slug="test-event",
-                outcome="Yes",
-                outcome_index=0,
-                transaction_hash="0xtx",
-                name=None,
-                pseudonym=None,
-            )
-            assert store.has_trade("t1") is False
-            store.record_trade(trade, notional=50.0)
-            assert store.has_trade("t1") is True
-            stats = store.wallet_stats("0xabc")
-            assert stats.trades_total == 1
-            assert stats.unique_markets_total == 1
-        finally:
-            store.close()
+            with store.transaction():
+                store.mark_alerted("k3")
+                store.upsert_market(replace(market, liquidity_num=1.0))
+                assert store.get_market("0xcond").liquidity_num == 1.0
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        assert store.should_alert("k1", cooldown_s=3600) is False
+        assert store.should_alert("k3", cooldown_s=3600) is True
+        assert store.get_market("0xcond") == market
+    finally:
+        store.close()
+
+    store = Store(db)
+    try:
+        assert store.should_alert("k1", cooldown_s=3600) is False
+        assert store.should_alert("k2", cooldown_s=3600) is False
+        assert store.should_alert("k3", cooldown_s=3600) is True
+    finally:
+        store.close()
+
+
+def test_store_migrates_alerts_to_without_rowid(tmp_path) -> None:  # noqa: ANN001
+    db = str(tmp_path / "t.db")
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE alerts (alert_key TEXT PRIMARY KEY, last_alert_ts INTEGER NOT NULL)")
+    conn.execute("INSERT INTO alerts VALUES ('k', 4102444800)")
+    conn.commit()
+    conn.close()
+
+    store = Store(db)
+    try:
+        (sql,) = store._conn.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'alerts'"
+        ).fetchone()
+        assert "WITHOUT ROWID" in sql
+        assert store.should_alert("k", cooldown_s=0) is False
+    finally:
+        store.close()
+
+
+def test_get_market_cache_refreshes_on_upsert(store, make_market) -> None:  # noqa: ANN001
+    assert store.get_market("0xcond") is None
+    market = make_market(slug="q", liquidity_num=1.0, volume24hr=2.0)
+    store.upsert_market(market)
+    assert store.get_market("0xcond") == market
+    assert store.get_market("0xcond") is store.get_market("0xcond")
+    store.upsert_market(replace(market, liquidity_num=3.0))
+    assert store.get_market("0xcond").liquidity_num == 3.0
+    assert store.get_markets_many(["0xcond", "0xnone", "0xcond"]) == {
+        "0xcond": replace(market, liquidity_num=3.0)
+    }